@@ -2,26 +2,59 @@
 Authentication API endpoints
 """
 
-import re
 from datetime import datetime
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from functools import lru_cache
+from typing import Annotated, Optional
+from urllib.parse import urlencode
+import httpx
+import orjson
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials
-from pydantic import BaseModel, EmailStr, field_validator
+from pydantic import AfterValidator, BaseModel, EmailStr
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, async_session_maker
+from app.core.responses import ORJSONResponse
 from app.core.security import (
     get_password_hash, 
-    verify_password, 
+    get_password_hash_async,
+    verify_password_async,
     create_access_token,
+    forget_cached_user,
     get_current_user,
     security
 )
 from app.models.user import User
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Shared client for Google OAuth requests, so TLS connections to Google are
+# kept alive and reused across logins (closed on application shutdown)
+google_http_client = httpx.AsyncClient(
+    http2=True,
+    timeout=10.0,
+    limits=httpx.Limits(max_keepalive_connections=20),
+)
+
+
+# Character classes for password strength checks, indexed by byte value
+_PW_LOWER = 1
+_PW_UPPER = 2
+_PW_DIGIT = 4
+_PW_SPECIAL = 8
+
+_PW_CLASS_TABLE = bytearray(256)
+for _c in b"abcdefghijklmnopqrstuvwxyz":
+    _PW_CLASS_TABLE[_c] = _PW_LOWER
+for _c in b"ABCDEFGHIJKLMNOPQRSTUVWXYZ":
+    _PW_CLASS_TABLE[_c] = _PW_UPPER
+for _c in b"0123456789":
+    _PW_CLASS_TABLE[_c] = _PW_DIGIT
+for _c in b"!@#$%^&*(),.?\":{}|<>_-+=[]\\/~`":
+    _PW_CLASS_TABLE[_c] = _PW_SPECIAL
 
 
 def validate_password_strength(password: str) -> tuple[bool, str]:
@@ -32,44 +65,67 @@ def validate_password_strength(password: str) -> tuple[bool, str]:
     - At least one uppercase letter
     - At least one digit
     - At least one special character
+    
+    All character classes are collected in a single pass over the whole
+    password, so the work done does not depend on where (or whether) each
+    class first appears.
     """
     if len(password) < 8:
         return False, "Password must be at least 8 characters long"
     
-    if not re.search(r'[a-z]', password):
+    classes = 0
+    table = _PW_CLASS_TABLE
+    for b in password.encode('utf-8'):
+        classes |= table[b]
+    
+    if not classes & _PW_LOWER:
         return False, "Password must contain at least one lowercase letter"
     
-    if not re.search(r'[A-Z]', password):
+    if not classes & _PW_UPPER:
         return False, "Password must contain at least one uppercase letter"
     
-    if not re.search(r'\d', password):
+    if not classes & _PW_DIGIT:
         return False, "Password must contain at least one digit"
     
-    if not re.search(r'[!@#$%^&*(),.?":{}|<>_\-+=\[\]\\\/~`]', password):
+    if not classes & _PW_SPECIAL:
         return False, "Password must contain at least one special character (!@#$%^&*etc.)"
     
     return True, ""
 
 
+# Hot user lookups, built once so every request reuses the same statement
+# (and its compiled-SQL cache entry)
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+USER_BY_GOOGLE_ID = select(User).where(User.google_id == bindparam("google_id"))
+
+# Hash verified against when there is no real hash to check, so failed
+# logins take as long as real ones
+_DUMMY_PASSWORD_HASH = get_password_hash("dummy-password-for-timing")
+
+
+def _require_strong_password(password: str) -> str:
+    """Pydantic validator wrapper around validate_password_strength"""
+    is_valid, error_msg = validate_password_strength(password)
+    if not is_valid:
+        raise ValueError(error_msg)
+    return password
+
+
+# Password field type shared by the register / change-password / create-user
+# models; the check runs as a plain after-validator inside pydantic-core
+StrongPassword = Annotated[str, AfterValidator(_require_strong_password)]
+
+
 def is_registration_allowed() -> bool:
     """Check if registration is allowed via settings"""
-    from app.core.config import settings
     return settings.allow_registration
 
 
 # Request/Response models
 class RegisterRequest(BaseModel):
     email: EmailStr
-    password: str
+    password: StrongPassword
     name: Optional[str] = None
-    
-    @field_validator('password')
-    @classmethod
-    def password_strength(cls, v):
-        is_valid, error_msg = validate_password_strength(v)
-        if not is_valid:
-            raise ValueError(error_msg)
-        return v
 
 
 class LoginRequest(BaseModel):
@@ -93,6 +149,29 @@ class UserResponse(BaseModel):
     settings: dict
 
 
+async def _insert_user_if_new(db: AsyncSession, **values) -> int:
+    """
+    Insert a user in a single round-trip, relying on the unique email index
+    instead of a separate existence check. Returns the new user's id.
+    """
+    stmt = (
+        pg_insert(User)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User.id)
+    )
+    user_id = await db.scalar(stmt)
+    
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    
+    await db.commit()
+    return user_id
+
+
 @router.post("/register", response_model=TokenResponse)
 async def register(
     request: RegisterRequest,
@@ -106,38 +185,25 @@ async def register(
             detail="Registration is currently disabled. Please contact administrator."
         )
     
-    # Check if user exists
-    result = await db.execute(select(User).where(User.email == request.email))
-    existing_user = result.scalar_one_or_none()
-    
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    # Create new user
-    user = User(
+    # Create new user (fails atomically if the email is taken)
+    user_id = await _insert_user_if_new(
+        db,
         email=request.email,
-        hashed_password=get_password_hash(request.password),
+        hashed_password=await get_password_hash_async(request.password),
         name=request.name,
         is_active=True,
         is_verified=False,
     )
     
-    db.add(user)
-    await db.commit()
-    await db.refresh(user)
-    
     # Generate token
-    access_token = create_access_token(data={"sub": str(user.id)})
+    access_token = create_access_token(data={"sub": str(user_id)})
     
     return TokenResponse(
         access_token=access_token,
         user={
-            "id": user.id,
-            "email": user.email,
-            "name": user.name,
+            "id": user_id,
+            "email": request.email,
+            "name": request.name,
         }
     )
 
@@ -148,23 +214,32 @@ async def registration_status():
     return {"registration_enabled": is_registration_allowed()}
 
 
+async def _update_last_login(user_id: int, login_time: datetime):
+    """Record a successful login (runs after the response is sent)"""
+    async with async_session_maker() as session:
+        await session.execute(
+            update(User).where(User.id == user_id).values(last_login=login_time)
+        )
+        await session.commit()
+
+
 @router.post("/login", response_model=TokenResponse)
 async def login(
     request: LoginRequest,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     """Login with email and password"""
     # Find user
-    result = await db.execute(select(User).where(User.email == request.email))
-    user = result.scalar_one_or_none()
+    user = await db.scalar(USER_BY_EMAIL, {"email": request.email})
     
-    if not user or not user.hashed_password:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid email or password"
-        )
+    # Always run a full hash verification, even for unknown emails or
+    # OAuth-only accounts, so response time doesn't reveal which emails exist
+    has_password = user is not None and bool(user.hashed_password)
+    target_hash = user.hashed_password if has_password else _DUMMY_PASSWORD_HASH
+    password_ok = await verify_password_async(request.password, target_hash)
     
-    if not verify_password(request.password, user.hashed_password):
+    if not has_password or not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -176,9 +251,8 @@ async def login(
             detail="User account is disabled"
         )
     
-    # Update last login
-    user.last_login = datetime.utcnow()
-    await db.commit()
+    # Update last login off the response path
+    background_tasks.add_task(_update_last_login, user.id, datetime.utcnow())
     
     # Generate token
     access_token = create_access_token(data={"sub": str(user.id)})
@@ -193,20 +267,29 @@ async def login(
     )
 
 
+def _user_response(user: User) -> ORJSONResponse:
+    """
+    Serialize a user in the UserResponse shape. The fields come straight
+    from the database, so the response is returned directly rather than
+    re-validated through the Pydantic model.
+    """
+    return ORJSONResponse({
+        "id": user.id,
+        "email": user.email,
+        "name": user.name,
+        "avatar_url": user.avatar_url,
+        "is_admin": user.is_admin or False,
+        "created_at": user.created_at,
+        "settings": user.get_settings(),
+    })
+
+
 @router.get("/me", response_model=UserResponse)
 async def get_me(
     current_user: User = Depends(get_current_user)
 ):
     """Get current user info"""
-    return UserResponse(
-        id=current_user.id,
-        email=current_user.email,
-        name=current_user.name,
-        avatar_url=current_user.avatar_url,
-        is_admin=current_user.is_admin or False,
-        created_at=current_user.created_at,
-        settings=current_user.get_settings()
-    )
+    return _user_response(current_user)
 
 
 @router.post("/logout")
@@ -227,44 +310,20 @@ async def update_me(
     
     current_user.updated_at = datetime.utcnow()
     await db.commit()
-    await db.refresh(current_user)
-    
-    return UserResponse(
-        id=current_user.id,
-        email=current_user.email,
-        name=current_user.name,
-        avatar_url=current_user.avatar_url,
-        is_admin=current_user.is_admin or False,
-        created_at=current_user.created_at,
-        settings=current_user.get_settings()
-    )
+    forget_cached_user(current_user.id)
+    
+    return _user_response(current_user)
 
 
 class ChangePasswordRequest(BaseModel):
     current_password: str
-    new_password: str
-    
-    @field_validator('new_password')
-    @classmethod
-    def password_strength(cls, v):
-        is_valid, error_msg = validate_password_strength(v)
-        if not is_valid:
-            raise ValueError(error_msg)
-        return v
+    new_password: StrongPassword
 
 
 class CreateUserRequest(BaseModel):
     email: EmailStr
-    password: str
+    password: StrongPassword
     is_admin: bool = False
-    
-    @field_validator('password')
-    @classmethod
-    def password_strength(cls, v):
-        is_valid, error_msg = validate_password_strength(v)
-        if not is_valid:
-            raise ValueError(error_msg)
-        return v
 
 
 @router.post("/change-password")
@@ -274,21 +333,28 @@ async def change_password(
     db: AsyncSession = Depends(get_db)
 ):
     """Change user password"""
-    if not current_user.hashed_password:
+    # Verify before branching on account type, so OAuth-only accounts
+    # take as long to reject as a wrong password
+    has_password = bool(current_user.hashed_password)
+    target_hash = current_user.hashed_password if has_password else _DUMMY_PASSWORD_HASH
+    password_ok = await verify_password_async(request.current_password, target_hash)
+    
+    if not has_password:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Password not set for OAuth users"
         )
     
-    if not verify_password(request.current_password, current_user.hashed_password):
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Current password is incorrect"
         )
     
-    current_user.hashed_password = get_password_hash(request.new_password)
+    current_user.hashed_password = await get_password_hash_async(request.new_password)
     current_user.updated_at = datetime.utcnow()
     await db.commit()
+    forget_cached_user(current_user.id)
     
     return {"message": "Password changed successfully"}
 
@@ -307,35 +373,22 @@ async def create_user(
             detail="Only administrators can create new users"
         )
     
-    # Check if user already exists
-    result = await db.execute(select(User).where(User.email == request.email))
-    existing_user = result.scalar_one_or_none()
-    
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    # Create new user
-    user = User(
+    # Create new user (fails atomically if the email is taken)
+    user_id = await _insert_user_if_new(
+        db,
         email=request.email,
-        hashed_password=get_password_hash(request.password),
+        hashed_password=await get_password_hash_async(request.password),
         is_active=True,
         is_verified=True,
         is_admin=request.is_admin,
     )
     
-    db.add(user)
-    await db.commit()
-    await db.refresh(user)
-    
     return {
         "message": "User created successfully",
         "user": {
-            "id": user.id,
-            "email": user.email,
-            "is_admin": user.is_admin,
+            "id": user_id,
+            "email": request.email,
+            "is_admin": request.is_admin,
         }
     }
 
@@ -347,29 +400,32 @@ class GoogleCallbackRequest(BaseModel):
     redirect_uri: str
 
 
+@lru_cache(maxsize=4)
+def _google_auth_url_template(client_id: str) -> str:
+    """Build the Google OAuth URL template (the frontend fills in {origin})"""
+    params = {
+        "client_id": client_id,
+        "redirect_uri": "{origin}/api/auth/google/callback",  # Will be replaced by frontend
+        "response_type": "code",
+        "scope": "openid email profile",
+        "access_type": "offline",
+        "prompt": "consent",
+    }
+    # Keep {origin} and the callback path literal so the frontend can substitute them
+    return "https://accounts.google.com/o/oauth2/v2/auth?" + urlencode(params, safe=":/{}")
+
+
 @router.get("/google")
 async def google_auth_url():
     """Get Google OAuth URL"""
-    from app.core.config import settings
-    
     if not settings.google_client_id:
         raise HTTPException(
             status_code=status.HTTP_501_NOT_IMPLEMENTED,
             detail="Google OAuth is not configured"
         )
     
-    # Build Google OAuth URL
-    params = {
-        "client_id": settings.google_client_id,
-        "redirect_uri": "{origin}/api/auth/google/callback",  # Will be replaced by frontend
-        "response_type": "code",
-        "scope": "openid email profile",
-        "access_type": "offline",
-        "prompt": "consent",
-    }
-    
     return {
-        "url_template": "https://accounts.google.com/o/oauth2/v2/auth?" + "&".join(f"{k}={v}" for k, v in params.items()),
+        "url_template": _google_auth_url_template(settings.google_client_id),
         "client_id": settings.google_client_id,
     }
 
@@ -380,9 +436,6 @@ async def google_callback(
     db: AsyncSession = Depends(get_db)
 ):
     """Handle Google OAuth callback"""
-    import httpx
-    from app.core.config import settings
-    
     if not settings.google_client_id or not settings.google_client_secret:
         raise HTTPException(
             status_code=status.HTTP_501_NOT_IMPLEMENTED,
@@ -390,39 +443,38 @@ async def google_callback(
         )
     
     # Exchange code for tokens
-    async with httpx.AsyncClient() as client:
-        token_response = await client.post(
-            "https://oauth2.googleapis.com/token",
-            data={
-                "client_id": settings.google_client_id,
-                "client_secret": settings.google_client_secret,
-                "code": request.code,
-                "grant_type": "authorization_code",
-                "redirect_uri": request.redirect_uri,
-            }
+    token_response = await google_http_client.post(
+        "https://oauth2.googleapis.com/token",
+        data={
+            "client_id": settings.google_client_id,
+            "client_secret": settings.google_client_secret,
+            "code": request.code,
+            "grant_type": "authorization_code",
+            "redirect_uri": request.redirect_uri,
+        }
+    )
+    
+    if token_response.status_code != 200:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Failed to exchange code: {token_response.text}"
         )
-        
-        if token_response.status_code != 200:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail=f"Failed to exchange code: {token_response.text}"
-            )
-        
-        tokens = token_response.json()
-        
-        # Get user info
-        userinfo_response = await client.get(
-            "https://www.googleapis.com/oauth2/v2/userinfo",
-            headers={"Authorization": f"Bearer {tokens['access_token']}"}
+    
+    tokens = orjson.loads(token_response.content)
+    
+    # Get user info
+    userinfo_response = await google_http_client.get(
+        "https://www.googleapis.com/oauth2/v2/userinfo",
+        headers={"Authorization": f"Bearer {tokens['access_token']}"}
+    )
+    
+    if userinfo_response.status_code != 200:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Failed to get user info"
         )
-        
-        if userinfo_response.status_code != 200:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Failed to get user info"
-            )
-        
-        userinfo = userinfo_response.json()
+    
+    userinfo = orjson.loads(userinfo_response.content)
     
     google_id = userinfo.get("id")
     email = userinfo.get("email")
@@ -436,13 +488,11 @@ async def google_callback(
         )
     
     # Find or create user
-    result = await db.execute(select(User).where(User.google_id == google_id))
-    user = result.scalar_one_or_none()
+    user = await db.scalar(USER_BY_GOOGLE_ID, {"google_id": google_id})
     
     if not user:
         # Check if email exists
-        result = await db.execute(select(User).where(User.email == email))
-        user = result.scalar_one_or_none()
+        user = await db.scalar(USER_BY_EMAIL, {"email": email})
         
         if user:
             # Link Google account to existing user
@@ -475,7 +525,7 @@ async def google_callback(
     
     user.last_login = datetime.utcnow()
     await db.commit()
-    await db.refresh(user)
+    forget_cached_user(user.id)
     
     # Generate token
     access_token = create_access_token(data={"sub": str(user.id)})
@@ -494,11 +544,6 @@ async def google_callback(
 @router.get("/google/status")
 async def google_oauth_status():
     """Check if Google OAuth is configured"""
-    from app.core.config import settings
-    import logging
-    
-    logger = logging.getLogger(__name__)
-    
     has_client_id = bool(settings.google_client_id)
     has_client_secret = bool(settings.google_client_secret)
     
@@ -2,28 +2,88 @@
 Health check endpoints
 """
 
+import asyncio
+import time
+import orjson
 from fastapi import APIRouter
+from fastapi.responses import Response
 from datetime import datetime
 import os
+import redis.asyncio as aioredis
 
-router = APIRouter()
+from app.core.config import settings
+from app.core.responses import ORJSONResponse
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Shared Redis client for readiness probes (pooled, short timeouts)
+redis_client = aioredis.from_url(
+    settings.redis_url,
+    max_connections=4,
+    socket_timeout=1.0,
+    socket_connect_timeout=1.0,
+)
+
+# ImageMagick availability doesn't change at runtime, so the probe result
+# is reused for this many seconds
+MAGICK_CHECK_TTL = 30.0
+_magick_check = (0.0, False)  # (monotonic timestamp, result)
+
+
+async def _check_imagemagick() -> bool:
+    """Run `magick -version`, caching the result for MAGICK_CHECK_TTL seconds"""
+    global _magick_check
+    
+    checked_at, ok = _magick_check
+    now = time.monotonic()
+    if checked_at and now - checked_at < MAGICK_CHECK_TTL:
+        return ok
+    
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "magick", "-version",
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            ok = await asyncio.wait_for(process.wait(), timeout=2) == 0
+        except asyncio.TimeoutError:
+            process.kill()
+            # Reap the child so it does not linger as a zombie
+            await process.wait()
+            ok = False
+    except Exception:
+        ok = False
+    
+    _magick_check = (now, ok)
+    return ok
+
+
+# Serialized /health body, rebuilt at most once per second
+_health_body = (0, b"")  # (unix second, JSON bytes)
 
 
 @router.get("/health")
 async def health_check():
     """Basic health check endpoint"""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat(),
-        "service": "imagemagick-webgui-api"
-    }
+    global _health_body
+    
+    now = int(time.time())
+    second, body = _health_body
+    if second != now:
+        body = orjson.dumps({
+            "status": "healthy",
+            "timestamp": datetime.utcnow().replace(microsecond=0),
+            "service": "imagemagick-webgui-api"
+        })
+        _health_body = (now, body)
+    
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/health/config")
 async def config_check():
     """Check configuration values (for debugging)"""
-    from app.core.config import settings
-    
     return {
         "require_login": settings.require_login,
         "default_output_format": settings.default_output_format,
@@ -37,9 +97,6 @@ async def config_check():
 @router.get("/health/ready")
 async def readiness_check():
     """Readiness check including dependencies"""
-    from app.core.config import settings
-    import redis
-    
     checks = {
         "api": True,
         "redis": False,
@@ -48,24 +105,18 @@ async def readiness_check():
     
     # Check Redis
     try:
-        r = redis.from_url(settings.redis_url)
-        r.ping()
+        await redis_client.ping()
         checks["redis"] = True
     except Exception:
         pass
     
     # Check ImageMagick
-    try:
-        import subprocess
-        result = subprocess.run(["magick", "-version"], capture_output=True)
-        checks["imagemagick"] = result.returncode == 0
-    except Exception:
-        pass
+    checks["imagemagick"] = await _check_imagemagick()
     
     all_healthy = all(checks.values())
     
     return {
         "status": "ready" if all_healthy else "degraded",
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": datetime.utcnow(),
         "checks": checks
     }
@@ -2,67 +2,60 @@
 Images API endpoints for upload and management
 """
 
+import asyncio
+import hashlib
 import logging
-import shlex
 import os
 from datetime import datetime, timedelta
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from typing import Dict, List, Optional, Tuple
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status, UploadFile, File, Query
 from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import bindparam, select, delete, insert
 from pathlib import Path
-import zipfile
-import io
 import re
 from app.core.database import get_db
-from app.core.security import get_current_user, get_current_user_optional
+from app.core.security import get_current_user, get_current_user_optional, validate_path
 from app.core.config import settings
+from app.core.responses import ORJSONResponse, etag_matches, not_modified_response
 from app.models.user import User
-from app.models.image import Image
+from app.models.image import Image, ImageKind
 from app.services.file_service import file_service
 from app.services.imagemagick import imagemagick_service
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 
-# Security: Path validation
-ALLOWED_DIRS = [
-    os.path.realpath(settings.upload_dir),
-    os.path.realpath(settings.processed_dir),
-    os.path.realpath(settings.temp_dir),
-    '/app/uploads',
-    '/app/processed',
-    '/tmp'
-]
+# Characters not allowed in generated preview filenames
+_STEM_SANITIZE = re.compile(r'[^A-Za-z0-9_\-]')
 
 
-def validate_path(file_path: str) -> str:
+# Hot image lookups, built once so every request reuses the same statement
+# (and its compiled-SQL cache entry)
+IMAGE_BY_ID = select(Image).where(Image.id == bindparam("image_id"))
+# Own images plus anonymous ones
+IMAGE_BY_ID_VISIBLE = IMAGE_BY_ID.where(
+    (Image.user_id == bindparam("user_id")) | (Image.user_id.is_(None))
+)
+IMAGE_BY_ID_OWNED = IMAGE_BY_ID.where(Image.user_id == bindparam("user_id"))
+
+# Delete by id in one round-trip, returning the files to clean up
+IMAGE_DELETE = (
+    delete(Image)
+    .where(Image.id == bindparam("image_id"))
+    .returning(Image.file_path, Image.thumbnail_path)
+    .execution_options(synchronize_session=False)
+)
+IMAGE_DELETE_OWNED = IMAGE_DELETE.where(Image.user_id == bindparam("user_id"))
+
+async def get_image_row(db: AsyncSession, image_id: int) -> Optional[Image]:
     """
-    Validate that a file path is within allowed directories.
-    Prevents path traversal attacks.
-    Returns the validated absolute path or raises HTTPException.
+    Look up an image by id without ownership filtering.
+    Repeated lookups within a request hit the session identity map.
     """
-    if not file_path:
-        raise HTTPException(status_code=400, detail="Invalid file path")
-    
-    # Resolve to absolute path
-    abs_path = os.path.realpath(file_path)
-    
-    # Check if path is within allowed directories
-    is_allowed = any(
-        abs_path.startswith(os.path.realpath(allowed_dir))
-        for allowed_dir in ALLOWED_DIRS
-        if allowed_dir and os.path.exists(os.path.dirname(allowed_dir) or '/')
-    )
-    
-    if not is_allowed:
-        logger.warning(f"Path traversal attempt blocked: {file_path} -> {abs_path}")
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    return abs_path
+    return await db.get(Image, image_id)
 
 
 # Response models
@@ -88,81 +81,112 @@ class UploadResponse(BaseModel):
     failed: List[dict]
 
 
-@router.post("/upload", response_model=UploadResponse)
-async def upload_images(
-    files: List[UploadFile] = File(...),
-    db: AsyncSession = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user_optional)
-):
-    """Upload multiple images"""
-    user_id = current_user.id if current_user else None
-    
-    uploaded = []
-    failed = []
-    
-    for file in files:
+# Caps concurrent ImageMagick work across all uploads
+upload_semaphore = asyncio.Semaphore(settings.upload_concurrency or os.cpu_count() or 4)
+
+
+async def _process_upload(
+    file: UploadFile,
+    user_id: Optional[int]
+) -> Tuple[Optional[dict], Optional[dict]]:
+    """
+    Validate, save, probe and thumbnail a single uploaded file.
+    Returns (row, None) on success or (None, failure) otherwise,
+    where row holds the column values for the Image insert.
+    """
+    async with upload_semaphore:
         try:
             # Validate file
             is_valid, error, mime_type = await file_service.validate_file(file)
             
             if not is_valid:
-                failed.append({
-                    "filename": file.filename,
-                    "error": error
-                })
-                continue
+                return None, {"filename": file.filename, "error": error}
             
             # Save file
             stored_filename, file_path, file_size = await file_service.save_upload(
                 file, user_id
             )
             
-            # Get image info
-            image_info = await imagemagick_service.get_image_info(file_path)
-            
-            # Create thumbnail
+            # Probe and thumbnail are independent ImageMagick calls; run both
+            # at once, letting one fail without losing the other
             logger.info(f"Creating thumbnail for {file_path}")
-            thumbnail_path = await file_service.create_thumbnail(file_path, user_id)
+            image_info, thumbnail_path = await asyncio.gather(
+                imagemagick_service.get_image_info(file_path),
+                file_service.create_thumbnail(file_path, user_id),
+                return_exceptions=True,
+            )
+            if isinstance(image_info, Exception):
+                logger.warning(f"Image info failed for {file_path}: {image_info}")
+                image_info = None
+            if isinstance(thumbnail_path, Exception):
+                logger.warning(f"Thumbnail failed for {file_path}: {thumbnail_path}")
+                thumbnail_path = None
             logger.info(f"Thumbnail result: {thumbnail_path}")
             
-            # Create database record
-            image = Image(
-                user_id=user_id,
-                original_filename=file.filename or "unknown",
-                stored_filename=stored_filename,
-                file_path=file_path,
-                thumbnail_path=thumbnail_path,
-                mime_type=mime_type,
-                file_size=file_size,
-                width=image_info.get("width") if image_info else None,
-                height=image_info.get("height") if image_info else None,
-                format=image_info.get("format") if image_info else None,
-                image_metadata=image_info or {},
-                expires_at=datetime.utcnow() + timedelta(hours=settings.history_retention_hours)
-            )
+            return {
+                "user_id": user_id,
+                "original_filename": file.filename or "unknown",
+                "stored_filename": stored_filename,
+                "file_path": file_path,
+                "thumbnail_path": thumbnail_path,
+                "mime_type": mime_type,
+                "file_size": file_size,
+                "width": image_info.get("width") if image_info else None,
+                "height": image_info.get("height") if image_info else None,
+                "format": image_info.get("format") if image_info else None,
+                "image_metadata": image_info or {},
+                "expires_at": datetime.utcnow() + timedelta(hours=settings.history_retention_hours),
+            }, None
             
-            db.add(image)
+        except Exception as e:
+            return None, {"filename": file.filename, "error": str(e)}
+
+
+@router.post("/upload", response_model=UploadResponse)
+async def upload_images(
+    files: List[UploadFile] = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user_optional)
+):
+    """Upload multiple images"""
+    user_id = current_user.id if current_user else None
+    
+    # Process files concurrently; the session is only touched afterwards
+    results = await asyncio.gather(*(_process_upload(file, user_id) for file in files))
+    
+    rows = [row for row, _ in results if row is not None]
+    failed = [failure for _, failure in results if failure is not None]
+    uploaded = []
+    
+    if rows:
+        # One multi-row INSERT ... RETURNING for the whole batch
+        stmt = insert(Image).returning(
+            Image.id, Image.created_at, sort_by_parameter_order=True
+        )
+        try:
+            inserted = (await db.execute(stmt, rows)).all()
             await db.commit()
-            await db.refresh(image)
-            
-            uploaded.append(ImageResponse(
-                id=image.id,
-                original_filename=image.original_filename,
-                stored_filename=image.stored_filename,
-                thumbnail_url=f"/api/images/{image.id}/thumbnail" if thumbnail_path else None,
-                mime_type=image.mime_type,
-                file_size=image.file_size,
-                width=image.width,
-                height=image.height,
-                format=image.format,
-                created_at=image.created_at
-            ))
-            
         except Exception as e:
-            failed.append({
-                "filename": file.filename,
-                "error": str(e)
-            })
+            await db.rollback()
+            failed.extend(
+                {"filename": row["original_filename"], "error": str(e)}
+                for row in rows
+            )
+            rows = inserted = []
+        
+        for row, (image_id, created_at) in zip(rows, inserted):
+            uploaded.append(ImageResponse.model_construct(
+                id=image_id,
+                original_filename=row["original_filename"],
+                stored_filename=row["stored_filename"],
+                thumbnail_url=f"/api/images/{image_id}/thumbnail" if row["thumbnail_path"] else None,
+                mime_type=row["mime_type"],
+                file_size=row["file_size"],
+                width=row["width"],
+                height=row["height"],
+                format=row["format"],
+                created_at=created_at
+            ))
     
     return UploadResponse(images=uploaded, failed=failed)
 
@@ -175,7 +199,20 @@ async def list_images(
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
     """List user's uploaded images"""
-    query = select(Image).order_by(Image.created_at.desc()).offset(skip).limit(limit)
+    # Project only the columns the response needs: no ORM objects, no lazy loads
+    query = select(
+        Image.id,
+        Image.original_filename,
+        Image.stored_filename,
+        Image.thumbnail_path,
+        Image.mime_type,
+        Image.file_size,
+        Image.width,
+        Image.height,
+        Image.format,
+        Image.created_at,
+        Image.project_id,
+    ).order_by(Image.created_at.desc()).offset(skip).limit(limit)
     
     if current_user:
         query = query.where(Image.user_id == current_user.id)
@@ -183,108 +220,193 @@ async def list_images(
         query = query.where(Image.user_id.is_(None))
     
     result = await db.execute(query)
-    images = result.scalars().all()
     
-    return [
-        ImageResponse(
-            id=img.id,
-            original_filename=img.original_filename,
-            stored_filename=img.stored_filename,
-            thumbnail_url=f"/api/images/{img.id}/thumbnail" if img.thumbnail_path else None,
-            mime_type=img.mime_type,
-            file_size=img.file_size,
-            width=img.width,
-            height=img.height,
-            format=img.format,
-            created_at=img.created_at,
-            project_id=img.project_id
-        )
-        for img in images
-    ]
+    # Values come straight from the database, so skip Pydantic entirely
+    # and let orjson serialize plain dicts
+    return ORJSONResponse([
+        {
+            "id": row.id,
+            "original_filename": row.original_filename,
+            "stored_filename": row.stored_filename,
+            "thumbnail_url": f"/api/images/{row.id}/thumbnail" if row.thumbnail_path else None,
+            "mime_type": row.mime_type,
+            "file_size": row.file_size,
+            "width": row.width,
+            "height": row.height,
+            "format": row.format,
+            "created_at": row.created_at,
+            "project_id": row.project_id,
+        }
+        for row in result
+    ])
 
 
 @router.get("/{image_id}")
 async def get_image(
     image_id: int,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
     """Get image file"""
-    query = select(Image).where(Image.id == image_id)
-    
     if current_user:
-        query = query.where(
-            (Image.user_id == current_user.id) | (Image.user_id.is_(None))
+        image = await db.scalar(
+            IMAGE_BY_ID_VISIBLE, {"image_id": image_id, "user_id": current_user.id}
         )
-    
-    result = await db.execute(query)
-    image = result.scalar_one_or_none()
+    else:
+        image = await get_image_row(db, image_id)
     
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
     
-    if not Path(image.file_path).exists():
+    # One stat() serves both the existence check and the response headers
+    file_stat = await asyncio.to_thread(file_service.stat_file, image.file_path)
+    if file_stat is None:
         raise HTTPException(status_code=404, detail="Image file not found")
     
+    # Stored files are never modified in place
+    cache_headers = {
+        "ETag": f'W/"{image.id}-{image.file_size}"',
+        "Cache-Control": "private, max-age=86400, immutable",
+    }
+    if etag_matches(request.headers.get("if-none-match"), cache_headers["ETag"]):
+        return not_modified_response(cache_headers)
+    
     # Use actual file extension for download filename
-    actual_extension = Path(image.file_path).suffix
-    original_stem = Path(image.original_filename).stem
-    download_filename = f"{original_stem}{actual_extension}"
+    actual_extension = image.file_extension
+    if actual_extension is None:
+        actual_extension = os.path.splitext(image.file_path)[1]
+    download_filename = f"{os.path.splitext(image.original_filename)[0]}{actual_extension}"
     
     return FileResponse(
         image.file_path,
         media_type=image.mime_type,
-        filename=download_filename
+        filename=download_filename,
+        headers=cache_headers,
+        stat_result=file_stat
     )
 
 
 @router.get("/{image_id}/thumbnail")
 async def get_thumbnail(
     image_id: int,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
     """Get image thumbnail"""
-    query = select(Image).where(Image.id == image_id)
-    
-    result = await db.execute(query)
-    image = result.scalar_one_or_none()
+    image = await get_image_row(db, image_id)
     
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
     
+    # Thumbnails are addressed by image id and never change; private, as
+    # they belong to a user and must not be kept by shared caches
+    cache_headers = {
+        "ETag": f'W/"{image.id}-{image.file_size}-thumb"',
+        "Cache-Control": "private, max-age=31536000, immutable",
+    }
+    
     # If thumbnail exists and file is there, return it
-    if image.thumbnail_path and Path(image.thumbnail_path).exists():
+    thumb_stat = await asyncio.to_thread(file_service.stat_file, image.thumbnail_path) if image.thumbnail_path else None
+    if thumb_stat is not None:
+        if etag_matches(request.headers.get("if-none-match"), cache_headers["ETag"]):
+            return not_modified_response(cache_headers)
         return FileResponse(
             image.thumbnail_path,
-            media_type="image/webp"
+            media_type="image/webp",
+            headers=cache_headers,
+            stat_result=thumb_stat
         )
     
     # For PDF without thumbnail, try to generate one on-the-fly
-    is_pdf = (image.mime_type and 'pdf' in image.mime_type.lower()) or \
-             (image.original_filename and image.original_filename.lower().endswith('.pdf'))
-    
-    if is_pdf and Path(image.file_path).exists():
+    if (
+        image.kind == ImageKind.PDF
+        and await asyncio.to_thread(file_service.stat_file, image.file_path) is not None
+    ):
         # Try to create thumbnail now
         user_id = image.user_id
         thumbnail_path = await file_service.create_thumbnail(image.file_path, user_id)
         
-        if thumbnail_path and Path(thumbnail_path).exists():
+        thumb_stat = await asyncio.to_thread(file_service.stat_file, thumbnail_path) if thumbnail_path else None
+        if thumb_stat is not None:
             # Update database
             image.thumbnail_path = thumbnail_path
             await db.commit()
             
             return FileResponse(
                 thumbnail_path,
-                media_type="image/webp"
+                media_type="image/webp",
+                headers=cache_headers,
+                stat_result=thumb_stat
             )
     
     raise HTTPException(status_code=404, detail="Thumbnail not found")
 
 
+# PDF page renders are CPU heavy; cap how many subprocesses run at once
+preview_render_semaphore = asyncio.Semaphore(max(1, (os.cpu_count() or 2) // 2))
+# Renders in flight keyed by output path, so concurrent requests for the
+# same page wait on one subprocess instead of each spawning their own
+_preview_renders: Dict[str, asyncio.Future] = {}
+
+
+async def _run_render(cmd: List[str]) -> bool:
+    """Run a render command, killing it on timeout"""
+    # create_subprocess_exec passes argv straight to the program, no shell
+    # is involved, so paths need no quoting
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        await asyncio.wait_for(process.communicate(), timeout=180)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise
+    return process.returncode == 0
+
+
+async def _render_pdf_page(pdf_path: str, page: int, output_path: str) -> bool:
+    """Render one PDF page to PNG: pdftoppm first, ImageMagick as fallback"""
+    async with preview_render_semaphore:
+        output_base = os.path.splitext(output_path)[0]
+        pdftoppm_cmd = ['pdftoppm', '-png', '-f', str(page + 1), '-l', str(page + 1), '-r', '150', '-singlefile', pdf_path, output_base]
+        try:
+            if await _run_render(pdftoppm_cmd) and await asyncio.to_thread(os.path.isfile, output_path):
+                return True
+        except Exception as e:
+            logger.exception(f"PDF preview generation failed: {e}")
+        
+        # Fallback to ImageMagick with safe arguments
+        magick_cmd = ['magick', '-density', '150', f'{pdf_path}[{page}]', '-background', 'white', '-alpha', 'remove', '-quality', '90', output_path]
+        try:
+            if await _run_render(magick_cmd) and await asyncio.to_thread(os.path.isfile, output_path):
+                return True
+        except Exception as e:
+            logger.exception(f"PDF preview fallback failed: {e}")
+    
+    return False
+
+
+async def render_pdf_preview(pdf_path: str, page: int, output_path: str) -> bool:
+    """Render a PDF page preview, joining an identical render already running"""
+    render = _preview_renders.get(output_path)
+    if render is None:
+        render = asyncio.ensure_future(_render_pdf_page(pdf_path, page, output_path))
+        _preview_renders[output_path] = render
+        render.add_done_callback(lambda _: _preview_renders.pop(output_path, None))
+    
+    # A client disconnecting must not cancel the render for everyone else
+    return await asyncio.shield(render)
+
+
 @router.get("/{image_id}/preview")
 async def get_preview(
     image_id: int,
+    request: Request,
     page: int = 0,
     db: AsyncSession = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user_optional)
@@ -294,10 +416,7 @@ async def get_preview(
     For images, returns the original file.
     For PDFs, converts to PNG and returns.
     """
-    query = select(Image).where(Image.id == image_id)
-    
-    result = await db.execute(query)
-    image = result.scalar_one_or_none()
+    image = await get_image_row(db, image_id)
     
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
@@ -305,7 +424,8 @@ async def get_preview(
     # Validate path is within allowed directories
     validated_path = validate_path(image.file_path)
     
-    if not Path(validated_path).exists():
+    file_stat = await asyncio.to_thread(file_service.stat_file, validated_path)
+    if file_stat is None:
         raise HTTPException(status_code=404, detail="File not found")
     
     # Validate page is a non-negative integer and strictly int-typed
@@ -317,26 +437,34 @@ async def get_preview(
         raise HTTPException(status_code=400, detail="Invalid page number")
     page = page_int
     
-    # Check if it's a PDF
-    is_pdf = image.mime_type == 'application/pdf' or image.original_filename.lower().endswith('.pdf')
-    
-    if not is_pdf:
+    if image.kind != ImageKind.PDF:
         # Return original image
         return FileResponse(
             validated_path,
             media_type=image.mime_type,
-            filename=image.original_filename
+            filename=image.original_filename,
+            stat_result=file_stat
         )
     
-    # For PDF, generate preview
-    import asyncio
+    # Rendered pages never change for a stored file, so let the client
+    # (not shared caches) keep them for good and revalidate with the ETag
+    digest = hashlib.blake2b(
+        f"{image.id}:{image.file_size}:{page}".encode(), digest_size=16
+    ).hexdigest()
+    etag = f'"{digest}"'
+    cache_headers = {
+        "ETag": etag,
+        "Cache-Control": "private, max-age=31536000, immutable",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified_response(cache_headers)
     
+    # For PDF, generate preview
     preview_dir = Path(validated_path).parent / "previews"
     preview_dir.mkdir(parents=True, exist_ok=True)
     
     # Sanitize stem to remove problematic characters
-    import re
-    stem_safe = re.sub(r'[^A-Za-z0-9_\-]', '_', Path(validated_path).stem)
+    stem_safe = _STEM_SANITIZE.sub('_', Path(validated_path).stem)
     preview_filename = f"{stem_safe}_page{page}.png"
     preview_path = preview_dir / preview_filename
     
@@ -357,54 +485,26 @@ async def get_preview(
     validated_preview = validate_path(str(preview_path_abs))
     
     # Check if preview already exists
-    if Path(validated_preview).exists():
+    preview_stat = await asyncio.to_thread(file_service.stat_file, validated_preview)
+    if preview_stat is not None:
         return FileResponse(
             validated_preview,
             media_type="image/png",
-            filename=preview_filename
-        )
-    
-    # Generate preview using pdftoppm with safe path quoting
-    temp_base = validated_preview.replace('.png', '')
-    safe_input = shlex.quote(validated_path)
-    safe_output = shlex.quote(temp_base)
-    pdftoppm_cmd = ['pdftoppm', '-png', '-f', str(page + 1), '-l', str(page + 1), '-r', '150', '-singlefile', validated_path, temp_base]
-    
-    try:
-        process = await asyncio.create_subprocess_exec(
-            *pdftoppm_cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
+            filename=preview_filename,
+            headers=cache_headers,
+            stat_result=preview_stat
         )
-        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=180)
-        
-        if process.returncode == 0 and Path(validated_preview).exists():
-            return FileResponse(
-                validated_preview,
-                media_type="image/png",
-                filename=preview_filename
-            )
-    except Exception as e:
-        logger.exception(f"PDF preview generation failed: {e}")
     
-    # Fallback to ImageMagick with safe arguments
-    try:
-        magick_cmd = ['magick', '-density', '150', f'{validated_path}[{page}]', '-background', 'white', '-alpha', 'remove', '-quality', '90', validated_preview]
-        process = await asyncio.create_subprocess_exec(
-            *magick_cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
+    # Generate preview (pdftoppm, falling back to ImageMagick)
+    if await render_pdf_preview(validated_path, page, validated_preview):
+        preview_stat = await asyncio.to_thread(file_service.stat_file, validated_preview)
+        return FileResponse(
+            validated_preview,
+            media_type="image/png",
+            filename=preview_filename,
+            headers=cache_headers,
+            stat_result=preview_stat
         )
-        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=180)
-        
-        if process.returncode == 0 and Path(validated_preview).exists():
-            return FileResponse(
-                validated_preview,
-                media_type="image/png",
-                filename=preview_filename
-            )
-    except Exception as e:
-        logger.exception(f"PDF preview fallback failed: {e}")
     
     raise HTTPException(status_code=500, detail="Failed to generate PDF preview")
 
@@ -422,15 +522,12 @@ async def rename_image(
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
     """Rename an image (change original_filename)"""
-    query = select(Image).where(Image.id == image_id)
-    
     if current_user:
-        query = query.where(
-            (Image.user_id == current_user.id) | (Image.user_id.is_(None))
+        image = await db.scalar(
+            IMAGE_BY_ID_VISIBLE, {"image_id": image_id, "user_id": current_user.id}
         )
-    
-    result = await db.execute(query)
-    image = result.scalar_one_or_none()
+    else:
+        image = await db.scalar(IMAGE_BY_ID, {"image_id": image_id})
     
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
@@ -464,10 +561,7 @@ async def get_image_info(
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
     """Get detailed image metadata"""
-    query = select(Image).where(Image.id == image_id)
-    
-    result = await db.execute(query)
-    image = result.scalar_one_or_none()
+    image = await get_image_row(db, image_id)
     
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
@@ -490,30 +584,28 @@ async def get_image_info(
 @router.delete("/{image_id}")
 async def delete_image(
     image_id: int,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
     """Delete an image"""
-    query = select(Image).where(Image.id == image_id)
-    
+    # The row is the source of truth: delete it first, touch the disk later
     if current_user:
-        query = query.where(Image.user_id == current_user.id)
-    
-    result = await db.execute(query)
-    image = result.scalar_one_or_none()
+        result = await db.execute(
+            IMAGE_DELETE_OWNED, {"image_id": image_id, "user_id": current_user.id}
+        )
+    else:
+        result = await db.execute(IMAGE_DELETE, {"image_id": image_id})
     
-    if not image:
+    deleted = result.first()
+    if not deleted:
         raise HTTPException(status_code=404, detail="Image not found")
     
-    # Delete files
-    await file_service.delete_file(image.file_path)
-    if image.thumbnail_path:
-        await file_service.delete_file(image.thumbnail_path)
-    
-    # Delete database record
-    await db.delete(image)
     await db.commit()
     
+    # Unlink files after the response has been sent
+    background_tasks.add_task(file_service.delete_files, [path for path in deleted if path])
+    
     return {"message": "Image deleted successfully"}
 
 
@@ -532,18 +624,11 @@ async def download_images_as_zip(
     if not images:
         raise HTTPException(status_code=404, detail="No images found")
     
-    # Create ZIP in memory
-    zip_buffer = io.BytesIO()
-    
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-        for image in images:
-            if Path(image.file_path).exists():
-                zf.write(image.file_path, image.original_filename)
-    
-    zip_buffer.seek(0)
+    # Stream the archive as it is built instead of buffering it in memory
+    files = [(image.file_path, image.original_filename) for image in images]
     
     return StreamingResponse(
-        zip_buffer,
+        file_service.aiter_zip(files),
         media_type="application/zip",
         headers={"Content-Disposition": "attachment; filename=images.zip"}
     )
@@ -2,60 +2,130 @@
 Operations API for image processing
 """
 
+import asyncio
+import base64
+import hashlib
+import logging
 import os
 import shlex
-from typing import List, Dict, Optional, Any
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+import tempfile
+import time
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Dict, Optional, Any, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, BackgroundTasks
+from fastapi.responses import FileResponse
 from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import bindparam, select, update
+import orjson
 from datetime import datetime
+from pathlib import Path
 import uuid
 
 from app.core.database import get_db
-from app.core.security import get_current_user_optional
+from app.core.security import get_current_user_optional, validate_path
 from app.core.config import settings
+from app.core.responses import ORJSONResponse, etag_matches, mime_for, not_modified_response
 from app.models.user import User
 from app.models.image import Image
 from app.models.job import Job, JobStatus
+from app.services.ai_service import ai_service
+from app.services.file_service import file_service
 from app.services.imagemagick import imagemagick_service
 from app.services.queue_service import queue_service
-from app.workers.tasks import process_images, process_raw_command
+from app.workers.tasks import process_background_removal, process_images, process_raw_command, process_upscale
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
+router = APIRouter(default_response_class=ORJSONResponse)
 
 
-# Security: Path validation
-ALLOWED_DIRS = [
-    os.path.realpath(settings.upload_dir),
-    os.path.realpath(settings.processed_dir),
-    os.path.realpath(settings.temp_dir),
-    '/app/uploads',
-    '/app/processed',
-    '/tmp'
-]
+# Column projection only: rows bypass the identity map and there are no
+# relationships to load, so no loader options are needed
+INPUT_FILES_BY_IDS = (
+    select(Image.id, Image.file_path)
+    .where(Image.id.in_(bindparam("image_ids", expanding=True)))
+)
 
 
-def validate_path(file_path: str) -> str:
+async def fetch_input_files(
+    db: AsyncSession,
+    image_ids: List[int]
+) -> Tuple[List[int], List[str]]:
     """
-    Validate that a file path is within allowed directories.
-    Prevents path traversal attacks.
+    Return (ids, file_paths) of the requested images with one projected
+    query, raising 404 if none exist.
     """
-    if not file_path:
-        raise HTTPException(status_code=400, detail="Invalid file path")
+    rows = (await db.execute(INPUT_FILES_BY_IDS, {"image_ids": image_ids})).all()
     
-    abs_path = os.path.realpath(file_path)
-    
-    is_allowed = any(
-        abs_path.startswith(os.path.realpath(allowed_dir))
-        for allowed_dir in ALLOWED_DIRS
-        if allowed_dir and os.path.exists(os.path.dirname(allowed_dir) or '/')
-    )
+    if not rows:
+        raise HTTPException(status_code=404, detail="No images found")
     
-    if not is_allowed:
-        raise HTTPException(status_code=403, detail="Access denied")
+    ids, input_files = zip(*rows)
+    return list(ids), list(input_files)
+
+
+@lru_cache(maxsize=1024)
+def _cached_validate(command: str) -> Tuple[bool, Optional[str]]:
+    """
+    Memoized imagemagick_service.validate_command. The check only matches
+    the string against the static BLOCKED_PATTERNS, so it is safe to cache
+    while the editor re-previews the same command. The error is None
+    for an accepted command.
+    """
+    is_valid, error = imagemagick_service.validate_command(command)
+    return is_valid, error or None
+
+
+# Earlier editor result for the same source, operations and owner
+EDIT_BY_CACHE_KEY = (
+    select(Image.id, Image.file_path)
+    .where(Image.cache_key == bindparam("cache_key"))
+    .where(Image.user_id.is_not_distinct_from(bindparam("user_id")))
+    .limit(1)
+)
+
+
+def _edit_cache_key(image_id: int, *params: Any) -> str:
+    """Hash of a source image id and everything that shapes an editor result"""
+    return hashlib.blake2b(orjson.dumps([image_id, *params]), digest_size=16).hexdigest()
+
+
+async def _cached_edit(
+    db: AsyncSession,
+    cache_key: str,
+    user_id: Optional[int]
+) -> Optional[Dict[str, Any]]:
+    """
+    Response for an identical earlier edit, or None if it has to run.
+    A hit reuses the earlier image as is; no new history entry is recorded.
+    """
+    row = (await db.execute(EDIT_BY_CACHE_KEY, {"cache_key": cache_key, "user_id": user_id})).first()
+    if row is None:
+        return None
+    
+    # The file may have been removed since (e.g. with its history entry):
+    # forget the result so the edit runs again
+    if await asyncio.to_thread(file_service.stat_file, row.file_path) is None:
+        await db.execute(
+            update(Image)
+            .where(Image.id == row.id)
+            .values(cache_key=None)
+            .execution_options(synchronize_session=False)
+        )
+        return None
     
-    return abs_path
+    return {
+        "success": True,
+        "image_id": row.id,
+        "image_url": f"/api/images/{row.id}"
+    }
+
+
+def _job_id(prefix: str) -> str:
+    """Unique job id: prefix plus a URL-safe base64 uuid4 (22 chars)"""
+    return f"{prefix}_{base64.urlsafe_b64encode(uuid.uuid4().bytes).rstrip(b'=').decode('ascii')}"
 
 
 # Request models
@@ -134,16 +204,8 @@ async def process_operation(
     """Process multiple images with specified operations"""
     user_id = current_user.id if current_user else None
     
-    # Get image records
-    query = select(Image).where(Image.id.in_(request.image_ids))
-    result = await db.execute(query)
-    images = result.scalars().all()
-    
-    if not images:
-        raise HTTPException(status_code=404, detail="No images found")
-    
-    # Get file paths
-    input_files = [img.file_path for img in images]
+    # Get image ids and file paths
+    image_ids, input_files = await fetch_input_files(db, request.image_ids)
     
     # Build operations list with quality
     operations = [op.model_dump() for op in request.operations]
@@ -153,15 +215,14 @@ async def process_operation(
     })
     
     # Generate job ID
-    job_id = f"job_{uuid.uuid4().hex}"
+    job_id = _job_id("job")
     
     # Create job record
     job = Job(
         job_id=job_id,
         user_id=user_id,
         operation="batch_process",
-        command=str(operations),
-        input_files=[img.id for img in images],
+        input_files=image_ids,
         parameters={
             "operations": operations,
             "output_format": request.output_format,
@@ -181,13 +242,13 @@ async def process_operation(
         request.output_format,
         user_id,
         job_id=job_id,
-        timeout=len(images) * 60  # 1 minute per image max
+        timeout=len(image_ids) * 60  # 1 minute per image max
     )
     
     return JobResponse(
         job_id=job_id,
         status="pending",
-        message=f"Processing {len(images)} images"
+        message=f"Processing {len(image_ids)} images"
     )
 
 
@@ -201,25 +262,18 @@ async def process_raw(
     user_id = current_user.id if current_user else None
     
     # Validate command
-    is_valid, error = imagemagick_service.validate_command(request.command)
+    is_valid, error = _cached_validate(request.command)
     if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid command: {error}"
         )
     
-    # Get image records
-    query = select(Image).where(Image.id.in_(request.image_ids))
-    result = await db.execute(query)
-    images = result.scalars().all()
-    
-    if not images:
-        raise HTTPException(status_code=404, detail="No images found")
-    
-    input_files = [img.file_path for img in images]
+    # Get image ids and file paths
+    image_ids, input_files = await fetch_input_files(db, request.image_ids)
     
     # Generate job ID
-    job_id = f"raw_{uuid.uuid4().hex}"
+    job_id = _job_id("raw")
     
     # Create job record
     job = Job(
@@ -227,7 +281,7 @@ async def process_raw(
         user_id=user_id,
         operation="raw_command",
         command=request.command,
-        input_files=[img.id for img in images],
+        input_files=image_ids,
         parameters={
             "raw_command": request.command,
             "output_format": request.output_format,
@@ -246,13 +300,13 @@ async def process_raw(
         request.output_format,
         user_id,
         job_id=job_id,
-        timeout=len(images) * 60
+        timeout=len(image_ids) * 60
     )
     
     return JobResponse(
         job_id=job_id,
         status="pending",
-        message=f"Processing {len(images)} images with raw command"
+        message=f"Processing {len(image_ids)} images with raw command"
     )
 
 
@@ -273,7 +327,7 @@ async def preview_command(request: PreviewCommandRequest):
     )
     
     # Validate
-    is_valid, error = imagemagick_service.validate_command(command)
+    is_valid, error = _cached_validate(command)
     
     return CommandPreviewResponse(
         command=command.replace("'{input}'", "input.jpg").replace("'{output}." + request.output_format + "'", f"output.{request.output_format}"),
@@ -282,119 +336,136 @@ async def preview_command(request: PreviewCommandRequest):
     )
 
 
-@router.get("/available")
-async def list_available_operations():
-    """List all available ImageMagick operations"""
-    return {
-        "resize": {
-            "description": "Resize image",
-            "params": {
-                "width": "Target width in pixels",
-                "height": "Target height in pixels",
-                "percent": "Scale by percentage (alternative to width/height)",
-                "mode": "fit (default), fill, or force"
-            }
-        },
-        "crop": {
-            "description": "Crop image",
-            "params": {
-                "width": "Crop width",
-                "height": "Crop height",
-                "x": "X offset from left",
-                "y": "Y offset from top"
-            }
-        },
-        "rotate": {
-            "description": "Rotate image",
-            "params": {"angle": "Rotation angle in degrees"}
-        },
-        "flip": {
-            "description": "Flip image vertically",
-            "params": {}
-        },
-        "flop": {
-            "description": "Flip image horizontally",
-            "params": {}
-        },
-        "blur": {
-            "description": "Apply Gaussian blur",
-            "params": {
-                "radius": "Blur radius",
-                "sigma": "Standard deviation"
-            }
-        },
-        "sharpen": {
-            "description": "Sharpen image",
-            "params": {
-                "radius": "Sharpen radius",
-                "sigma": "Standard deviation"
-            }
-        },
-        "grayscale": {
-            "description": "Convert to grayscale",
-            "params": {}
-        },
-        "sepia-tone": {
-            "description": "Apply sepia effect",
-            "params": {"threshold": "Intensity (0-100)"}
-        },
-        "brightness-contrast": {
-            "description": "Adjust brightness and contrast",
-            "params": {
-                "brightness": "-100 to 100",
-                "contrast": "-100 to 100"
-            }
-        },
-        "modulate": {
-            "description": "Adjust brightness, saturation, hue",
-            "params": {
-                "brightness": "Percentage (100 = no change)",
-                "saturation": "Percentage (100 = no change)",
-                "hue": "Percentage (100 = no change)"
-            }
-        },
-        "auto-orient": {
-            "description": "Auto-rotate based on EXIF",
-            "params": {}
-        },
-        "enhance": {
-            "description": "Auto-enhance image",
-            "params": {}
-        },
-        "auto-level": {
-            "description": "Auto-adjust levels",
-            "params": {}
-        },
-        "normalize": {
-            "description": "Normalize image histogram",
-            "params": {}
-        },
-        "trim": {
-            "description": "Trim borders",
-            "params": {}
-        },
-        "strip": {
-            "description": "Remove metadata",
-            "params": {}
-        },
-        "negate": {
-            "description": "Invert colors",
-            "params": {}
-        },
-        "watermark": {
-            "description": "Add text watermark",
-            "params": {
-                "text": "Watermark text",
-                "position": "Position (northwest, north, northeast, west, center, east, southwest, south, southeast)",
-                "font_size": "Font size in pixels (default: 24)",
-                "opacity": "Opacity 0-1 (default: 0.5)"
-            }
-        },
-        "remove-background": {
-            "description": "AI-powered background removal",
-            "params": {}
+# Static catalogue served by /available, serialized once at import
+AVAILABLE_OPERATIONS = {
+    "resize": {
+        "description": "Resize image",
+        "params": {
+            "width": "Target width in pixels",
+            "height": "Target height in pixels",
+            "percent": "Scale by percentage (alternative to width/height)",
+            "mode": "fit (default), fill, or force"
+        }
+    },
+    "crop": {
+        "description": "Crop image",
+        "params": {
+            "width": "Crop width",
+            "height": "Crop height",
+            "x": "X offset from left",
+            "y": "Y offset from top"
+        }
+    },
+    "rotate": {
+        "description": "Rotate image",
+        "params": {"angle": "Rotation angle in degrees"}
+    },
+    "flip": {
+        "description": "Flip image vertically",
+        "params": {}
+    },
+    "flop": {
+        "description": "Flip image horizontally",
+        "params": {}
+    },
+    "blur": {
+        "description": "Apply Gaussian blur",
+        "params": {
+            "radius": "Blur radius",
+            "sigma": "Standard deviation"
+        }
+    },
+    "sharpen": {
+        "description": "Sharpen image",
+        "params": {
+            "radius": "Sharpen radius",
+            "sigma": "Standard deviation"
+        }
+    },
+    "grayscale": {
+        "description": "Convert to grayscale",
+        "params": {}
+    },
+    "sepia-tone": {
+        "description": "Apply sepia effect",
+        "params": {"threshold": "Intensity (0-100)"}
+    },
+    "brightness-contrast": {
+        "description": "Adjust brightness and contrast",
+        "params": {
+            "brightness": "-100 to 100",
+            "contrast": "-100 to 100"
+        }
+    },
+    "modulate": {
+        "description": "Adjust brightness, saturation, hue",
+        "params": {
+            "brightness": "Percentage (100 = no change)",
+            "saturation": "Percentage (100 = no change)",
+            "hue": "Percentage (100 = no change)"
+        }
+    },
+    "auto-orient": {
+        "description": "Auto-rotate based on EXIF",
+        "params": {}
+    },
+    "enhance": {
+        "description": "Auto-enhance image",
+        "params": {}
+    },
+    "auto-level": {
+        "description": "Auto-adjust levels",
+        "params": {}
+    },
+    "normalize": {
+        "description": "Normalize image histogram",
+        "params": {}
+    },
+    "trim": {
+        "description": "Trim borders",
+        "params": {}
+    },
+    "strip": {
+        "description": "Remove metadata",
+        "params": {}
+    },
+    "negate": {
+        "description": "Invert colors",
+        "params": {}
+    },
+    "watermark": {
+        "description": "Add text watermark",
+        "params": {
+            "text": "Watermark text",
+            "position": "Position (northwest, north, northeast, west, center, east, southwest, south, southeast)",
+            "font_size": "Font size in pixels (default: 24)",
+            "opacity": "Opacity 0-1 (default: 0.5)"
         }
+    },
+    "remove-background": {
+        "description": "AI-powered background removal",
+        "params": {}
     }
+}
+
+_AVAILABLE_OPERATIONS_BODY = orjson.dumps(AVAILABLE_OPERATIONS)
+_AVAILABLE_OPERATIONS_HEADERS = {
+    "Cache-Control": "public, max-age=3600",
+    "ETag": f'"{hashlib.blake2b(_AVAILABLE_OPERATIONS_BODY, digest_size=16).hexdigest()}"',
+}
+
+
+@router.get("/available")
+async def list_available_operations(request: Request):
+    """List all available ImageMagick operations"""
+    if etag_matches(request.headers.get("if-none-match"), _AVAILABLE_OPERATIONS_HEADERS["ETag"]):
+        return not_modified_response(_AVAILABLE_OPERATIONS_HEADERS)
+    
+    return Response(
+        content=_AVAILABLE_OPERATIONS_BODY,
+        media_type="application/json",
+        headers=_AVAILABLE_OPERATIONS_HEADERS
+    )
 
 
 # New request models for live preview
@@ -410,19 +481,26 @@ class RemoveBackgroundRequest(BaseModel):
     alpha_matting: bool = False
 
 
+def _file_data_uri(file_path: str, mime_type: str) -> str:
+    """Read a file and encode it as a data: URI (blocking; run in a thread)"""
+    with open(file_path, "rb") as f:
+        data = base64.b64encode(f.read())
+    return (b"data:" + mime_type.encode() + b";base64," + data).decode("ascii")
+
+
 @router.post("/live-preview")
 async def live_preview(
     request: LivePreviewRequest,
+    as_url: bool = False,
     db: AsyncSession = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
     """
     Generate a live preview of operations applied to an image.
     Returns base64 encoded image for instant display.
+    Without operations the original is returned as a data URI, or with
+    as_url=true as its /api/images URL for the client to fetch directly.
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    
     try:
         # Get image record
         query = select(Image).where(Image.id == request.image_id)
@@ -432,20 +510,26 @@ async def live_preview(
         if not image:
             raise HTTPException(status_code=404, detail="Image not found")
         
-        from pathlib import Path
-        if not Path(image.file_path).exists():
+        if not await asyncio.to_thread(os.path.isfile, image.file_path):
             raise HTTPException(status_code=404, detail="Image file not found")
         
         # If no operations, just return original image as base64
         operations = [op.model_dump() for op in request.operations]
         
         if not operations or len(operations) == 0:
+            # Opt-in: let the client fetch the original directly rather
+            # than inflating it by a third as base64 inside JSON
+            if as_url:
+                return {"preview": f"/api/images/{image.id}", "success": True}
+            
             # Return original image
-            import base64
-            with open(image.file_path, "rb") as f:
-                data = base64.b64encode(f.read()).decode()
-            mime_type = image.mime_type or "image/png"
-            return {"preview": f"data:{mime_type};base64,{data}", "success": True}
+            preview = await asyncio.to_thread(
+                _file_data_uri, image.file_path, image.mime_type or "image/png"
+            )
+            return {"preview": preview, "success": True}
+        
+        # Release the DB connection while ImageMagick renders the preview
+        await db.commit()
         
         # Generate preview
         preview_data = await imagemagick_service.apply_preview(
@@ -458,12 +542,11 @@ async def live_preview(
             return {"preview": preview_data, "success": True}
         else:
             # If preview fails, return original
-            import base64
-            with open(image.file_path, "rb") as f:
-                data = base64.b64encode(f.read()).decode()
-            mime_type = image.mime_type or "image/png"
+            preview = await asyncio.to_thread(
+                _file_data_uri, image.file_path, image.mime_type or "image/png"
+            )
             logger.warning(f"Preview generation failed, returning original image")
-            return {"preview": f"data:{mime_type};base64,{data}", "success": True, "warning": "Using original image"}
+            return {"preview": preview, "success": True, "warning": "Using original image"}
             
     except HTTPException:
         raise
@@ -485,25 +568,17 @@ async def remove_background(
     user_id = current_user.id if current_user else None
     
     # Check if AI service is available
-    from app.services.ai_service import ai_service
     if not await ai_service.is_available():
         raise HTTPException(
             status_code=503,
             detail="AI background removal service is not available"
         )
     
-    # Get image records
-    query = select(Image).where(Image.id.in_(request.image_ids))
-    result = await db.execute(query)
-    images = result.scalars().all()
-    
-    if not images:
-        raise HTTPException(status_code=404, detail="No images found")
-    
-    input_files = [img.file_path for img in images]
+    # Get image ids and file paths
+    image_ids, input_files = await fetch_input_files(db, request.image_ids)
     
     # Generate job ID
-    job_id = f"bg_removal_{uuid.uuid4().hex}"
+    job_id = _job_id("bg_removal")
     
     # Create job record
     job = Job(
@@ -511,7 +586,7 @@ async def remove_background(
         user_id=user_id,
         operation="remove_background",
         command="rembg",
-        input_files=[img.id for img in images],
+        input_files=image_ids,
         parameters={
             "output_format": request.output_format,
             "alpha_matting": request.alpha_matting,
@@ -523,7 +598,6 @@ async def remove_background(
     await db.commit()
     
     # Enqueue job
-    from app.workers.tasks import process_background_removal
     queue_service.enqueue(
         process_background_removal,
         input_files,
@@ -531,13 +605,13 @@ async def remove_background(
         request.alpha_matting,
         user_id,
         job_id=job_id,
-        timeout=len(images) * 120  # 2 minutes per image max
+        timeout=len(image_ids) * 120  # 2 minutes per image max
     )
     
     return JobResponse(
         job_id=job_id,
         status="pending",
-        message=f"Removing background from {len(images)} images"
+        message=f"Removing background from {len(image_ids)} images"
     )
 
 
@@ -547,89 +621,30 @@ class SingleRemoveBackgroundRequest(BaseModel):
     alpha_matting: bool = False
 
 
-@router.post("/remove-background-single", response_model=JobResponse)
-async def remove_background_single(
-    request: SingleRemoveBackgroundRequest,
-    db: AsyncSession = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user_optional)
-):
-    """Remove background from a single image (for editor)"""
-    user_id = current_user.id if current_user else None
-    
-    # Check AI
-    from app.services.ai_service import ai_service
-    if not await ai_service.is_available():
-        raise HTTPException(status_code=503, detail="AI service not available")
-    
-    # Get image
-    query = select(Image).where(Image.id == request.image_id)
-    result = await db.execute(query)
-    image = result.scalar_one_or_none()
-    
-    if not image:
-        raise HTTPException(status_code=404, detail="Image not found")
-    
-    job_id = f"bg_removal_{uuid.uuid4().hex}"
-    
-    job = Job(
-        job_id=job_id,
-        user_id=user_id,
-        operation="remove_background",
-        command="rembg",
-        input_files=[image.id],
-        parameters={"output_format": "png", "alpha_matting": request.alpha_matting},
-        status=JobStatus.PENDING
-    )
-    
-    db.add(job)
-    await db.commit()
-    
-    from app.workers.tasks import process_background_removal
-    queue_service.enqueue(
-        process_background_removal,
-        [image.file_path],
-        "png",
-        request.alpha_matting,
-        user_id,
-        job_id=job_id,
-        timeout=120
-    )
-    
-    return JobResponse(job_id=job_id, status="pending", message="Removing background...")
+BG_REMOVAL_SOURCE = (
+    select(Image.id, Image.file_path, Image.original_filename)
+    .where(Image.id == bindparam("image_id"))
+)
 
 
-# Synchronous remove background for editor (immediate result)
-@router.post("/remove-background-sync")
-async def remove_background_sync(
-    request: SingleRemoveBackgroundRequest,
-    db: AsyncSession = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user_optional)
+async def _run_bg_removal(
+    db: AsyncSession,
+    image_id: int,
+    alpha_matting: bool,
+    user_id: Optional[int],
+    sync: bool
 ):
     """
-    Remove background synchronously and return new image URL.
-    Used by editor for immediate result with loading overlay.
+    Shared path for the single-image background removal endpoints: one AI
+    check and one projected lookup, then either queue the job (sync=False,
+    returns a JobResponse) or wait for the worker and register the result
+    as a new image (sync=True, returns the new image's id and URL).
     """
-    from pathlib import Path
-    from app.services.ai_service import ai_service
-    from app.services.file_service import file_service
-    from app.models.job import Job
-    import logging
-    
-    logger = logging.getLogger(__name__)
-    logger.info(f"Remove background request: image_id={request.image_id}")
-    
-    user_id = current_user.id if current_user else None
-    
-    # Check AI
     if not await ai_service.is_available():
         logger.error("AI service not available")
         raise HTTPException(status_code=503, detail="AI service not available")
     
-    # Get image
-    query = select(Image).where(Image.id == request.image_id)
-    result = await db.execute(query)
-    image = result.scalar_one_or_none()
-    
+    image = (await db.execute(BG_REMOVAL_SOURCE, {"image_id": image_id})).one_or_none()
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
     
@@ -637,33 +652,65 @@ async def remove_background_sync(
     validated_input_path = validate_path(image.file_path)
     logger.info(f"Validated image path: {validated_input_path}")
     
-    # Generate output path
-    output_path = file_service.get_output_path(
-        Path(validated_input_path).name,
-        "png",
-        user_id
-    )
+    if not sync:
+        job_id = _job_id("bg_removal")
+        job = Job(
+            job_id=job_id,
+            user_id=user_id,
+            operation="remove_background",
+            command="rembg",
+            input_files=[image.id],
+            parameters={"output_format": "png", "alpha_matting": alpha_matting},
+            status=JobStatus.PENDING
+        )
+        
+        db.add(job)
+        await db.commit()
+        
+        queue_service.enqueue(
+            process_background_removal,
+            [validated_input_path],
+            "png",
+            alpha_matting,
+            user_id,
+            job_id=job_id,
+            timeout=120
+        )
+        
+        return JobResponse(job_id=job_id, status="pending", message="Removing background...")
     
+    # Same image and settings as an earlier run: hand back that result
+    cache_key = _edit_cache_key(image.id, "remove_background", alpha_matting)
+    cached = await _cached_edit(db, cache_key, user_id)
+    if cached:
+        return cached
+    
+    # Release the DB connection for the length of the worker round-trip
+    await db.commit()
+    
+    job_id = _job_id("bg")
     try:
-        # Run AI background removal
+        # Run AI background removal on the RQ worker and wait for it
         logger.info("Starting background removal...")
-        result_path = await ai_service.remove_background(
-            validated_input_path,
-            output_path,
-            alpha_matting=request.alpha_matting
+        results = await queue_service.run(
+            process_background_removal,
+            [validated_input_path],
+            "png",
+            alpha_matting,
+            user_id,
+            job_id=job_id,
+            timeout=300
         )
+        output_path = results["output_files"][0] if results["output_files"] else None
         
-        if not result_path or not Path(result_path).exists():
+        # One stat in a worker thread covers existence and size
+        output_stat = await asyncio.to_thread(file_service.stat_file, output_path) if output_path else None
+        if output_stat is None:
             logger.error("Background removal failed - no result file")
             raise HTTPException(status_code=500, detail="Background removal failed")
         
         # Generate thumbnail for the processed image
-        thumb_dir = Path(output_path).parent / "thumbnails"
-        thumb_dir.mkdir(parents=True, exist_ok=True)
-        thumb_path = thumb_dir / f"{Path(output_path).stem}_thumb.webp"
-        
-        await imagemagick_service.create_thumbnail(output_path, str(thumb_path), 300)
-        thumbnail_path = str(thumb_path) if thumb_path.exists() else None
+        thumbnail_path = await imagemagick_service.create_output_thumbnail(output_path)
         
         # Create new image record
         stored_filename = Path(output_path).name
@@ -674,25 +721,23 @@ async def remove_background_sync(
             file_path=output_path,
             thumbnail_path=thumbnail_path,
             mime_type="image/png",
-            file_size=Path(output_path).stat().st_size,
+            file_size=output_stat.st_size,
+            cache_key=cache_key,
         )
-        db.add(new_image)
-        
         # Create history entry
         job = Job(
-            job_id=f"bg_{uuid.uuid4().hex[:8]}",
+            job_id=job_id,
             user_id=user_id,
             operation="remove_background",
             status="completed",
             progress=100,
-            input_files=[request.image_id],
+            input_files=[image.id],
             output_files=[output_path],
-            parameters={"alpha_matting": request.alpha_matting},
+            parameters={"alpha_matting": alpha_matting},
         )
-        db.add(job)
-        
+        # Both rows go out in the same flush and commit
+        db.add_all([new_image, job])
         await db.commit()
-        await db.refresh(new_image)
         
         return {
             "success": True,
@@ -704,6 +749,34 @@ async def remove_background_sync(
         raise HTTPException(status_code=500, detail=f"Background removal failed: {str(e)}")
 
 
+@router.post("/remove-background-single", response_model=JobResponse)
+async def remove_background_single(
+    request: SingleRemoveBackgroundRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user_optional)
+):
+    """Remove background from a single image (for editor)"""
+    user_id = current_user.id if current_user else None
+    return await _run_bg_removal(db, request.image_id, request.alpha_matting, user_id, sync=False)
+
+
+# Synchronous remove background for editor (immediate result)
+@router.post("/remove-background-sync")
+async def remove_background_sync(
+    request: SingleRemoveBackgroundRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user_optional)
+):
+    """
+    Remove background synchronously and return new image URL.
+    Used by editor for immediate result with loading overlay.
+    """
+    logger.info(f"Remove background request: image_id={request.image_id}")
+    
+    user_id = current_user.id if current_user else None
+    return await _run_bg_removal(db, request.image_id, request.alpha_matting, user_id, sync=True)
+
+
 # ============== UPSCALE ==============
 
 class UpscaleRequest(BaseModel):
@@ -725,12 +798,6 @@ async def upscale_image(
     - lanczos: Fast, uses high-quality Lanczos resampling with sharpening
     - esrgan: AI-based upscaling (requires Real-ESRGAN, best quality but slow)
     """
-    from pathlib import Path
-    from app.services.ai_service import ai_service
-    from app.services.file_service import file_service
-    import logging
-    
-    logger = logging.getLogger(__name__)
     logger.info(f"Upscale request: image_id={request.image_id}, scale={request.scale}, method={request.method}")
     
     # Get image
@@ -755,36 +822,38 @@ async def upscale_image(
     )
     logger.info(f"Output path: {output_path}")
     
+    # Release the DB connection while the worker upscales
+    await db.commit()
+    
+    job_id = _job_id("up")
     try:
-        # Perform upscaling
+        # Upscale on the RQ worker and wait for it
         logger.info("Starting upscale operation...")
-        result_path = await ai_service.upscale(
+        results = await queue_service.run(
+            process_upscale,
             image.file_path,
             output_path,
-            scale=request.scale,
-            method=request.method
+            request.scale,
+            request.method,
+            job_id=job_id,
+            timeout=300
         )
+        result_path = results["output_files"][0]
         
         logger.info(f"Upscale result: {result_path}")
         
-        if not result_path or not Path(result_path).exists():
+        # One stat in a worker thread covers existence and size
+        output_stat = await asyncio.to_thread(file_service.stat_file, result_path)
+        if output_stat is None:
             logger.error("Upscaling failed - no result file")
             raise HTTPException(status_code=500, detail="Upscaling failed")
         
-        # Get new image dimensions
-        from PIL import Image as PILImage
-        with PILImage.open(result_path) as img:
-            new_width, new_height = img.size
+        new_width, new_height = results["width"], results["height"]
         
         logger.info(f"New dimensions: {new_width}x{new_height}")
         
         # Generate thumbnail
-        thumb_dir = Path(output_path).parent / "thumbnails"
-        thumb_dir.mkdir(parents=True, exist_ok=True)
-        thumb_path = thumb_dir / f"{Path(output_path).stem}_thumb.webp"
-        
-        await imagemagick_service.create_thumbnail(output_path, str(thumb_path), 300)
-        thumbnail_path = str(thumb_path) if thumb_path.exists() else None
+        thumbnail_path = await imagemagick_service.create_output_thumbnail(output_path)
         
         # Create new image record
         stored_filename = Path(output_path).name
@@ -795,15 +864,13 @@ async def upscale_image(
             file_path=output_path,
             thumbnail_path=thumbnail_path,
             mime_type="image/png",
-            file_size=Path(output_path).stat().st_size,
+            file_size=output_stat.st_size,
             width=new_width,
             height=new_height,
         )
-        db.add(new_image)
-        
         # Create history entry
         job = Job(
-            job_id=f"up_{uuid.uuid4().hex[:8]}",
+            job_id=job_id,
             user_id=user_id,
             operation="upscale",
             status="completed",
@@ -817,10 +884,9 @@ async def upscale_image(
                 "new_size": f"{new_width}x{new_height}"
             },
         )
-        db.add(job)
-        
+        # Both rows go out in the same flush and commit
+        db.add_all([new_image, job])
         await db.commit()
-        await db.refresh(new_image)
         
         return {
             "success": True,
@@ -839,7 +905,6 @@ async def upscale_image(
 @router.get("/ai-capabilities")
 async def get_ai_capabilities():
     """Get available AI capabilities"""
-    from app.services.ai_service import ai_service
     return await ai_service.get_capabilities()
 
 
@@ -850,6 +915,36 @@ class ProcessSyncRequest(BaseModel):
     output_format: str = "jpg"  # Changed from png - png causes segfault with rembg libs
 
 
+# History label for process-sync: operation -> (priority, operation_type).
+# When several operations are combined, the lowest priority wins.
+_OP_TO_TYPE = MappingProxyType({
+    "crop": (0, "crop"),
+    "brightness-contrast": (1, "adjustments"),
+    "modulate": (1, "adjustments"),
+    "blur": (2, "filter"),
+    "sharpen": (2, "filter"),
+    "watermark": (3, "watermark"),
+    "annotate": (3, "watermark"),
+    "rotate": (4, "rotate"),
+    "flip": (4, "rotate"),
+    "flop": (4, "rotate"),
+    "resize": (5, "resize"),
+    "sepia-tone": (6, "filter"),
+    "grayscale": (6, "filter"),
+    "enhance": (7, "auto_enhance"),
+    "auto-level": (7, "auto_enhance"),
+})
+
+
+def _operation_type(operations: List[Dict[str, Any]]) -> str:
+    """History label for a set of process-sync operations ("edit" if none match)"""
+    _, operation_type = min(
+        (_OP_TO_TYPE[op["operation"]] for op in operations if op.get("operation") in _OP_TO_TYPE),
+        default=(None, "edit")
+    )
+    return operation_type
+
+
 @router.post("/process-sync")
 async def process_sync(
     request: ProcessSyncRequest,
@@ -860,13 +955,6 @@ async def process_sync(
     Process image synchronously and return URL to result.
     Used for instant crop preview in editor.
     """
-    from pathlib import Path
-    from app.services.file_service import file_service
-    from app.models.job import Job
-    import logging
-    
-    logger = logging.getLogger(__name__)
-    
     user_id = current_user.id if current_user else None
     
     # Get image
@@ -886,25 +974,7 @@ async def process_sync(
     logger.info(f"PROCESS-SYNC: image_id={request.image_id}")
     
     # Determine operation name for history
-    op_names = [op.get("operation", "") for op in operations]
-    if "crop" in op_names:
-        operation_type = "crop"
-    elif "brightness-contrast" in op_names or "modulate" in op_names:
-        operation_type = "adjustments"
-    elif "blur" in op_names or "sharpen" in op_names:
-        operation_type = "filter"
-    elif "watermark" in op_names or "annotate" in op_names:
-        operation_type = "watermark"
-    elif "rotate" in op_names or "flip" in op_names or "flop" in op_names:
-        operation_type = "rotate"
-    elif "resize" in op_names:
-        operation_type = "resize"
-    elif "sepia-tone" in op_names or "grayscale" in op_names:
-        operation_type = "filter"
-    elif "enhance" in op_names or "auto-level" in op_names:
-        operation_type = "auto_enhance"
-    else:
-        operation_type = "edit"
+    operation_type = _operation_type(operations)
     
     # For PDF input, ALWAYS force PNG output since ImageMagick rasterizes PDFs
     actual_output_format = request.output_format
@@ -912,37 +982,48 @@ async def process_sync(
     if is_pdf_input:
         actual_output_format = 'png'  # PDF is rasterized, output as PNG
     
-    # Generate output path
-    output_path = file_service.get_output_path(
-        Path(validated_input_path).name,
-        actual_output_format,
-        user_id
-    )
+    # Same image, operations and format as an earlier run: hand back that result
+    cache_key = _edit_cache_key(image.id, operations, actual_output_format)
+    cached = await _cached_edit(db, cache_key, user_id)
+    if cached:
+        logger.info(f"PROCESS-SYNC: reusing image_id={cached['image_id']}")
+        return cached
     
-    logger.info(f"PROCESS-SYNC: input={validated_input_path}, output={output_path}")
+    logger.info(f"PROCESS-SYNC: input={validated_input_path}")
     logger.info(f"PROCESS-SYNC: operations={operations}")
     
-    # Build and execute command
-    command = await imagemagick_service.build_command(
-        validated_input_path,
-        output_path,
-        operations
-    )
+    # Release the DB connection while the worker processes the image
+    await db.commit()
     
-    logger.info(f"PROCESS-SYNC: command={command}")
+    # Build and execute the command on the RQ worker and wait for it
+    job_id = _job_id("sync")
+    try:
+        results = await queue_service.run(
+            process_images,
+            [validated_input_path],
+            operations,
+            actual_output_format,
+            user_id,
+            job_id=job_id,
+            timeout=settings.imagemagick_timeout
+        )
+    except (RuntimeError, TimeoutError) as e:
+        raise HTTPException(status_code=500, detail=f"Processing failed: {e}")
     
-    success, stdout, stderr = await imagemagick_service.execute(command)
+    if not results["output_files"]:
+        error = results["failed"][0]["error"] if results["failed"] else "Unknown error"
+        raise HTTPException(status_code=500, detail=f"Processing failed: {error}")
+    output_path = results["output_files"][0]
     
-    if not success or not Path(output_path).exists():
-        raise HTTPException(status_code=500, detail=f"Processing failed: {stderr}")
+    logger.info(f"PROCESS-SYNC: output={output_path}")
     
-    # Generate thumbnail for the processed image
-    thumb_dir = Path(output_path).parent / "thumbnails"
-    thumb_dir.mkdir(parents=True, exist_ok=True)
-    thumb_path = thumb_dir / f"{Path(output_path).stem}_thumb.webp"
+    # One stat in a worker thread covers existence and size
+    output_stat = await asyncio.to_thread(file_service.stat_file, output_path)
+    if output_stat is None:
+        raise HTTPException(status_code=500, detail="Processing failed: output file missing")
     
-    await imagemagick_service.create_thumbnail(output_path, str(thumb_path), 300)
-    thumbnail_path = str(thumb_path) if thumb_path.exists() else None
+    # Generate thumbnail for the processed image
+    thumbnail_path = await imagemagick_service.create_output_thumbnail(output_path)
     
     # Create new image record for the processed image
     stored_filename = Path(output_path).name
@@ -953,13 +1034,12 @@ async def process_sync(
         file_path=output_path,
         thumbnail_path=thumbnail_path,
         mime_type=f"image/{actual_output_format}",
-        file_size=Path(output_path).stat().st_size,
+        file_size=output_stat.st_size,
+        cache_key=cache_key,
     )
-    db.add(new_image)
-    
     # Create history entry
     job = Job(
-        job_id=f"sync_{uuid.uuid4().hex[:8]}",
+        job_id=job_id,
         user_id=user_id,
         operation=operation_type,
         status="completed",
@@ -968,10 +1048,9 @@ async def process_sync(
         output_files=[output_path],
         parameters={"operations": operations, "output_format": request.output_format},
     )
-    db.add(job)
-    
+    # Both rows go out in the same flush and commit
+    db.add_all([new_image, job])
     await db.commit()
-    await db.refresh(new_image)
     
     # Return URL to new image
     return {
@@ -981,6 +1060,11 @@ async def process_sync(
     }
 
 
+# Output formats download-direct may produce; an exact whitelist, so a
+# member can go straight into a file name
+DOWNLOAD_FORMATS = frozenset({'webp', 'png', 'jpg', 'jpeg', 'gif', 'avif', 'tiff', 'bmp'})
+
+
 class DownloadDirectRequest(BaseModel):
     image_id: int
     operations: List[Operation]
@@ -999,15 +1083,10 @@ async def download_direct(
     Does not save to database - just processes and streams file.
     """
     # Validate output format
-    allowed_formats = {'webp', 'png', 'jpg', 'jpeg', 'gif', 'avif', 'tiff', 'bmp'}
-    if request.output_format.lower() not in allowed_formats:
+    actual_output_format = request.output_format.lower()
+    if actual_output_format not in DOWNLOAD_FORMATS:
         raise HTTPException(status_code=400, detail="Invalid output format")
     
-    from pathlib import Path
-    from fastapi.responses import FileResponse
-    from app.services.file_service import file_service
-    import tempfile
-    
     user_id = current_user.id if current_user else None
     
     # Get image
@@ -1024,9 +1103,6 @@ async def download_direct(
     # Build operations
     operations = [op.model_dump() for op in request.operations]
     
-    # Sanitize output format
-    actual_output_format = request.output_format.lower().replace('/', '').replace('\\', '').replace('..', '')
-    
     # For PDF input, force image output since ImageMagick rasterizes PDFs
     is_pdf_input = validated_input_path.lower().endswith('.pdf') or (image.mime_type and 'pdf' in image.mime_type.lower())
     if is_pdf_input:
@@ -1042,6 +1118,9 @@ async def download_direct(
     # SECURITY: Validate output path to prevent path traversal
     validated_output_path = validate_path(output_path)
     
+    # Release the DB connection while ImageMagick runs
+    await db.commit()
+    
     # Build and execute command
     command = await imagemagick_service.build_command(
         validated_input_path,
@@ -1051,43 +1130,61 @@ async def download_direct(
     
     success, stdout, stderr = await imagemagick_service.execute(command)
     
-    if not success or not Path(validated_output_path).exists():
-    raise HTTPException(status_code=500, detail=f"Processing failed: {stderr}")
-
+    output_stat = await asyncio.to_thread(file_service.stat_file, validated_output_path) if success else None
+    if output_stat is None:
+        raise HTTPException(status_code=500, detail=f"Processing failed: {stderr}")
     
-    # Get MIME type
-    mime_types = {
-        "webp": "image/webp",
-        "png": "image/png",
-        "jpg": "image/jpeg",
-        "jpeg": "image/jpeg",
-        "gif": "image/gif",
-    }
-    media_type = mime_types.get(actual_output_format, "application/octet-stream")
+    media_type = mime_for(actual_output_format)
     
-    # Return file for download
+    # Return file for download, zero-copy where the server supports it,
+    # and remove the temp file once it has been sent
     # SECURITY: Use validated path to prevent path traversal
     return FileResponse(
-        path=validated_output_path,
-        filename=output_filename,
+        validated_output_path,
         media_type=media_type,
+        filename=output_filename,
         headers={
-        "Content-Disposition": f'attachment; filename="{output_filename}"'
-       },
-       background=None  # Don't delete file until response is sent
-)
+            "Content-Disposition": f'attachment; filename="{output_filename}"'
+        },
+        stat_result=output_stat,
+        background=BackgroundTask(file_service.delete_files, [validated_output_path])
+    )
 
 
 # ============== AI DIAGNOSTICS ==============
 
-@router.get("/ai-status")
-async def ai_status():
-    """Check AI service status and diagnose issues"""
-    from app.services.ai_service import ai_service
-    
+# Status polls within the TTL share one result; a refresh already running
+# is joined instead of diagnosing again
+AI_STATUS_TTL = 15.0
+_ai_status_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+_ai_status_refresh: Optional[asyncio.Future] = None
+
+
+async def _collect_ai_status() -> Dict[str, Any]:
+    global _ai_status_cache
     result = {
         "available": await ai_service.is_available(),
         "diagnostics": await ai_service.diagnose(),
     }
-    
+    _ai_status_cache = (time.monotonic(), result)
     return result
+
+
+@router.get("/ai-status")
+async def ai_status():
+    """Check AI service status and diagnose issues"""
+    global _ai_status_refresh
+    if _ai_status_cache and time.monotonic() - _ai_status_cache[0] < AI_STATUS_TTL:
+        return _ai_status_cache[1]
+    
+    if _ai_status_refresh is None:
+        _ai_status_refresh = asyncio.ensure_future(_collect_ai_status())
+        _ai_status_refresh.add_done_callback(_clear_ai_status_refresh)
+    
+    # A client disconnecting must not cancel the refresh for everyone else
+    return await asyncio.shield(_ai_status_refresh)
+
+
+def _clear_ai_status_refresh(_: asyncio.Future) -> None:
+    global _ai_status_refresh
+    _ai_status_refresh = None
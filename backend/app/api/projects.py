@@ -6,10 +6,11 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy.orm import undefer
+from sqlalchemy import select, or_, update
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.database import UTC_NOW, get_db
 from app.core.security import get_current_user, get_current_user_optional
 from app.models.user import User
 from app.models.project import Project
@@ -57,6 +58,19 @@ class MoveImagesRequest(BaseModel):
     project_id: Optional[int] = None  # None means remove from project
 
 
+# Exactly the fields of ProjectResponse, so rows map straight onto it
+PROJECT_SUMMARY = select(
+    Project.id,
+    Project.name,
+    Project.description,
+    Project.color,
+    Project.icon,
+    Project.image_count,
+    Project.created_at,
+    Project.updated_at,
+)
+
+
 @router.get("/", response_model=ProjectListResponse)
 async def list_projects(
     db: AsyncSession = Depends(get_db),
@@ -68,28 +82,13 @@ async def list_projects(
     
     # Get projects with image count
     query = (
-        select(Project, func.count(Image.id).label("image_count"))
-        .outerjoin(Image, Image.project_id == Project.id)
+        PROJECT_SUMMARY
         .where(Project.user_id == current_user.id)
-        .group_by(Project.id)
         .order_by(Project.updated_at.desc())
     )
     
     result = await db.execute(query)
-    rows = result.all()
-    
-    projects = []
-    for project, image_count in rows:
-        projects.append(ProjectResponse(
-            id=project.id,
-            name=project.name,
-            description=project.description,
-            color=project.color,
-            icon=project.icon,
-            image_count=image_count,
-            created_at=project.created_at,
-            updated_at=project.updated_at
-        ))
+    projects = [ProjectResponse(**row._mapping) for row in result]
     
     return ProjectListResponse(projects=projects, total=len(projects))
 
@@ -132,12 +131,7 @@ async def get_project(
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific project"""
-    query = (
-        select(Project, func.count(Image.id).label("image_count"))
-        .outerjoin(Image, Image.project_id == Project.id)
-        .where(Project.id == project_id, Project.user_id == current_user.id)
-        .group_by(Project.id)
-    )
+    query = PROJECT_SUMMARY.where(Project.id == project_id, Project.user_id == current_user.id)
     
     result = await db.execute(query)
     row = result.first()
@@ -145,18 +139,7 @@ async def get_project(
     if not row:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    project, image_count = row
-    
-    return ProjectResponse(
-        id=project.id,
-        name=project.name,
-        description=project.description,
-        color=project.color,
-        icon=project.icon,
-        image_count=image_count,
-        created_at=project.created_at,
-        updated_at=project.updated_at
-    )
+    return ProjectResponse(**row._mapping)
 
 
 @router.put("/{project_id}", response_model=ProjectResponse)
@@ -167,7 +150,7 @@ async def update_project(
     current_user: User = Depends(get_current_user)
 ):
     """Update a project"""
-    query = select(Project).where(
+    query = select(Project).options(undefer(Project.image_count)).where(
         Project.id == project_id,
         Project.user_id == current_user.id
     )
@@ -189,18 +172,13 @@ async def update_project(
     project.updated_at = datetime.utcnow()
     await db.commit()
     
-    # Get image count
-    count_query = select(func.count(Image.id)).where(Image.project_id == project_id)
-    count_result = await db.execute(count_query)
-    image_count = count_result.scalar() or 0
-    
     return ProjectResponse(
         id=project.id,
         name=project.name,
         description=project.description,
         color=project.color,
         icon=project.icon,
-        image_count=image_count,
+        image_count=project.image_count,
         created_at=project.created_at,
         updated_at=project.updated_at
     )
@@ -223,18 +201,20 @@ async def delete_project(
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    # Unassign images from project
-    update_query = select(Image).where(Image.project_id == project_id)
-    images_result = await db.execute(update_query)
-    images = images_result.scalars().all()
-    
-    for image in images:
-        image.project_id = None
+    # Unassign images from project in one statement
+    result = await db.execute(
+        update(Image)
+        .where(Image.project_id == project_id)
+        .values(project_id=None)
+        .returning(Image.id)
+        .execution_options(synchronize_session=False)
+    )
+    unassigned = result.scalars().all()
     
     await db.delete(project)
     await db.commit()
     
-    return {"message": "Project deleted", "images_unassigned": len(images)}
+    return {"message": "Project deleted", "images_unassigned": len(unassigned)}
 
 
 @router.post("/{project_id}/images")
@@ -245,33 +225,35 @@ async def add_images_to_project(
     current_user: User = Depends(get_current_user)
 ):
     """Add images to a project"""
-    # Verify project exists and belongs to user
-    project_query = select(Project).where(
-        Project.id == project_id,
-        Project.user_id == current_user.id
+    # Verify project exists and belongs to user, touching updated_at in the
+    # same statement with the database clock
+    result = await db.execute(
+        update(Project)
+        .where(Project.id == project_id, Project.user_id == current_user.id)
+        .values(updated_at=UTC_NOW)
+        .returning(Project.id)
+        .execution_options(synchronize_session=False)
     )
-    result = await db.execute(project_query)
-    project = result.scalar_one_or_none()
     
-    if not project:
+    if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    # Update images
-    images_query = select(Image).where(Image.id.in_(data.image_ids))
-    images_result = await db.execute(images_query)
-    images = images_result.scalars().all()
-    
-    updated = 0
-    for image in images:
-        # Only update if user owns the image or it's anonymous
-        if image.user_id is None or image.user_id == current_user.id:
-            image.project_id = project_id
-            updated += 1
+    # Update images the user owns (or anonymous ones) in one statement
+    result = await db.execute(
+        update(Image)
+        .where(
+            Image.id.in_(data.image_ids),
+            or_(Image.user_id.is_(None), Image.user_id == current_user.id)
+        )
+        .values(project_id=project_id)
+        .returning(Image.id)
+        .execution_options(synchronize_session=False)
+    )
+    updated = result.scalars().all()
     
-    project.updated_at = datetime.utcnow()
     await db.commit()
     
-    return {"message": f"Added {updated} images to project", "project_id": project_id}
+    return {"message": f"Added {len(updated)} images to project", "project_id": project_id}
 
 
 @router.post("/images/remove")
@@ -281,19 +263,21 @@ async def remove_images_from_project(
     current_user: User = Depends(get_current_user)
 ):
     """Remove images from their projects"""
-    images_query = select(Image).where(Image.id.in_(data.image_ids))
-    images_result = await db.execute(images_query)
-    images = images_result.scalars().all()
-    
-    updated = 0
-    for image in images:
-        if image.user_id is None or image.user_id == current_user.id:
-            image.project_id = None
-            updated += 1
+    result = await db.execute(
+        update(Image)
+        .where(
+            Image.id.in_(data.image_ids),
+            or_(Image.user_id.is_(None), Image.user_id == current_user.id)
+        )
+        .values(project_id=None)
+        .returning(Image.id)
+        .execution_options(synchronize_session=False)
+    )
+    updated = result.scalars().all()
     
     await db.commit()
     
-    return {"message": f"Removed {updated} images from projects"}
+    return {"message": f"Removed {len(updated)} images from projects"}
 
 
 @router.get("/{project_id}/images")
@@ -303,28 +287,38 @@ async def get_project_images(
     current_user: User = Depends(get_current_user)
 ):
     """Get all images in a project"""
-    # Verify project exists and belongs to user
-    project_query = select(Project).where(
+    # Project (for the ownership check) and its images in one round-trip;
+    # a project without images still yields one row with NULL image columns
+    query = select(
+        Project.id.label("project_id"),
+        Project.name,
+        Project.color,
+        Project.icon,
+        Image.id,
+        Image.original_filename,
+        Image.mime_type,
+        Image.file_size,
+        Image.width,
+        Image.height,
+        Image.created_at,
+    ).outerjoin(
+        Image, Image.project_id == Project.id
+    ).where(
         Project.id == project_id,
         Project.user_id == current_user.id
-    )
-    result = await db.execute(project_query)
-    project = result.scalar_one_or_none()
+    ).order_by(Image.created_at.desc())
     
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
+    rows = (await db.execute(query)).all()
     
-    # Get images
-    images_query = select(Image).where(
-        Image.project_id == project_id
-    ).order_by(Image.created_at.desc())
+    if not rows:
+        raise HTTPException(status_code=404, detail="Project not found")
     
-    images_result = await db.execute(images_query)
-    images = images_result.scalars().all()
+    project = rows[0]
+    images = [row for row in rows if row.id is not None]
     
     return {
         "project": {
-            "id": project.id,
+            "id": project.project_id,
             "name": project.name,
             "color": project.color,
             "icon": project.icon
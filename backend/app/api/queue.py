@@ -2,25 +2,26 @@
 Queue API for job management
 """
 
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
+from sqlalchemy.orm import load_only
 from datetime import datetime
 from pathlib import Path
-import zipfile
-import io
-import mimetypes
 
-from app.core.database import get_db
+from app.core.database import UTC_NOW, get_db
+from app.core.responses import mime_for
 from app.core.security import get_current_user_optional
 from app.models.user import User
 from app.models.job import Job, JobStatus
 from app.models.image import Image
-from app.services.queue_service import queue_service
+from app.services.file_service import file_service
 from app.services.imagemagick import imagemagick_service
+from app.services.queue_service import queue_service
 
 router = APIRouter()
 
@@ -51,6 +52,32 @@ class QueueStatsResponse(BaseModel):
     failed: int
 
 
+# Job columns list_jobs may update from RQ
+_SYNCED_JOB_COLUMNS = ("status", "progress", "started_at", "completed_at", "error_message", "output_files")
+
+
+def _job_detail(job: Job, overrides: Optional[Dict[str, Any]] = None) -> JobDetailResponse:
+    """Response for a job, with pending column changes applied on top"""
+    values = {column: getattr(job, column) for column in _SYNCED_JOB_COLUMNS}
+    if overrides:
+        values.update(overrides)
+    
+    return JobDetailResponse(
+        id=job.id,
+        job_id=job.job_id,
+        operation=job.operation,
+        status=values["status"],
+        progress=values["progress"],
+        error_message=values["error_message"],
+        input_files=job.input_files or [],
+        output_files=values["output_files"] or [],
+        created_at=job.created_at,
+        started_at=values["started_at"],
+        completed_at=values["completed_at"],
+        parameters=job.parameters or {}
+    )
+
+
 @router.get("/stats", response_model=QueueStatsResponse)
 async def get_queue_stats():
     """Get queue statistics"""
@@ -72,7 +99,12 @@ async def list_jobs(
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
     """List user's jobs"""
-    query = select(Job).order_by(Job.created_at.desc()).limit(limit)
+    # Everything JobDetailResponse needs; skips command and user_id
+    query = select(Job).options(load_only(
+        Job.id, Job.job_id, Job.operation, Job.status, Job.progress,
+        Job.error_message, Job.input_files, Job.output_files, Job.parameters,
+        Job.created_at, Job.started_at, Job.completed_at
+    )).order_by(Job.created_at.desc()).limit(limit)
     
     if current_user:
         query = query.where(Job.user_id == current_user.id)
@@ -85,62 +117,69 @@ async def list_jobs(
     result = await db.execute(query)
     jobs = result.scalars().all()
     
-    # Sync status from RQ for pending/processing jobs
-    updated = False
+    # Sync status from RQ for pending/processing jobs, fetched in one batch
+    active_ids = [
+        job.job_id for job in jobs
+        if job.status in [JobStatus.PENDING, JobStatus.PROCESSING]
+    ]
+    rq_statuses = queue_service.get_job_statuses(active_ids)
+    
+    # Collect changes per job instead of dirtying ORM rows, so they can be
+    # written with one executemany UPDATE rather than a flush per row
+    changes: Dict[int, Dict[str, Any]] = {}
+    now = datetime.utcnow()
     for job in jobs:
-        if job.status in [JobStatus.PENDING, JobStatus.PROCESSING]:
-            rq_status = queue_service.get_job_status(job.job_id)
-            if rq_status:
-                if rq_status["status"] == "finished":
-                    job.status = JobStatus.COMPLETED
-                    job.completed_at = datetime.utcnow()
-                    if rq_status.get("result"):
-                        job.output_files = rq_status["result"].get("output_files", [])
-                    updated = True
-                elif rq_status["status"] == "failed":
-                    job.status = JobStatus.FAILED
-                    job.error_message = rq_status.get("exc_info", "Unknown error")[:500]
-                    job.completed_at = datetime.utcnow()
-                    updated = True
-                elif rq_status["status"] == "started":
-                    job.status = JobStatus.PROCESSING
-                    job.started_at = job.started_at or datetime.utcnow()
-                    updated = True
-                
-                if rq_status.get("meta"):
-                    job.progress = rq_status["meta"].get("progress", 0)
-            else:
-                # Job not found in RQ - might have expired
-                # Check if it's been pending for more than 5 minutes
-                if job.created_at:
-                    age_seconds = (datetime.utcnow() - job.created_at).total_seconds()
-                    if age_seconds > 300:  # 5 minutes
-                        # Mark as failed (expired)
-                        job.status = JobStatus.FAILED
-                        job.error_message = "Job expired or was lost. Please try again."
-                        job.completed_at = datetime.utcnow()
-                        updated = True
-    
-    if updated:
+        if job.status not in [JobStatus.PENDING, JobStatus.PROCESSING]:
+            continue
+        
+        change: Dict[str, Any] = {}
+        rq_status = rq_statuses.get(job.job_id)
+        if rq_status:
+            if rq_status["status"] == "finished":
+                change["status"] = JobStatus.COMPLETED
+                change["completed_at"] = now
+                if rq_status.get("result"):
+                    change["output_files"] = rq_status["result"].get("output_files", [])
+            elif rq_status["status"] == "failed":
+                change["status"] = JobStatus.FAILED
+                change["error_message"] = (rq_status.get("exc_info") or "Unknown error")[:500]
+                change["completed_at"] = now
+            elif rq_status["status"] == "started":
+                change["status"] = JobStatus.PROCESSING
+                change["started_at"] = job.started_at or now
+            
+            if rq_status.get("meta"):
+                progress = rq_status["meta"].get("progress", 0)
+                if progress != job.progress:
+                    change["progress"] = progress
+        else:
+            # Job not found in RQ - might have expired
+            # Check if it's been pending for more than 5 minutes
+            if job.created_at:
+                age_seconds = (now - job.created_at).total_seconds()
+                if age_seconds > 300:  # 5 minutes
+                    # Mark as failed (expired)
+                    change["status"] = JobStatus.FAILED
+                    change["error_message"] = "Job expired or was lost. Please try again."
+                    change["completed_at"] = now
+        
+        if change:
+            changes[job.id] = change
+    
+    if changes:
+        # Same keys in every row keeps it a single batch
+        await db.execute(update(Job), [
+            {
+                "id": job.id,
+                **{column: getattr(job, column) for column in _SYNCED_JOB_COLUMNS},
+                **changes[job.id],
+            }
+            for job in jobs
+            if job.id in changes
+        ])
         await db.commit()
     
-    return [
-        JobDetailResponse(
-            id=job.id,
-            job_id=job.job_id,
-            operation=job.operation,
-            status=job.status,
-            progress=job.progress,
-            error_message=job.error_message,
-            input_files=job.input_files or [],
-            output_files=job.output_files or [],
-            created_at=job.created_at,
-            started_at=job.started_at,
-            completed_at=job.completed_at,
-            parameters=job.parameters or {}
-        )
-        for job in jobs
-    ]
+    return [_job_detail(job, changes.get(job.id)) for job in jobs]
 
 
 @router.get("/jobs/{job_id}", response_model=JobDetailResponse)
@@ -158,6 +197,12 @@ async def get_job(
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
+    # Failed and cancelled rows are final; no need to ask Redis. Completed
+    # ones still are, as list_jobs may have completed them without
+    # registering their outputs as images
+    if job.status in [JobStatus.FAILED, JobStatus.CANCELLED]:
+        return _job_detail(job)
+    
     # Update status from RQ
     rq_status = queue_service.get_job_status(job_id)
     if rq_status:
@@ -168,45 +213,53 @@ async def get_job(
                 output_files = rq_status["result"].get("output_files", [])
                 job.output_files = output_files
                 
-                # Create Image records for processed files if not already created
-                user_id = current_user.id if current_user else None
-                for output_path in output_files:
-                    # Check if Image record already exists for this path
-                    existing = await db.execute(
-                        select(Image).where(Image.file_path == output_path)
-                    )
-                    if existing.scalar_one_or_none():
-                        continue  # Already exists
+                # Create Image records for processed files if not already created,
+                # checking all paths with one query
+                existing_paths = set((await db.execute(
+                    select(Image.file_path).where(Image.file_path.in_(output_files))
+                )).scalars()) if output_files else set()
+                new_paths = [path for path in output_files if path not in existing_paths]
+                
+                if new_paths:
+                    user_id = current_user.id if current_user else None
                     
-                    # Create thumbnail
-                    thumb_dir = Path(output_path).parent / "thumbnails"
-                    thumb_dir.mkdir(parents=True, exist_ok=True)
-                    thumb_path = thumb_dir / f"{Path(output_path).stem}_thumb.webp"
+                    # Persist the status now so the pooled connection is not
+                    # held while thumbnails are rendered
+                    await db.commit()
                     
+                    # Thumbnails in one batched ImageMagick call
                     try:
-                        await imagemagick_service.create_thumbnail(output_path, str(thumb_path), 300)
-                        thumbnail_path = str(thumb_path) if thumb_path.exists() else None
+                        thumbnails = await imagemagick_service.create_output_thumbnails(new_paths)
                     except Exception:
-                        thumbnail_path = None
+                        thumbnails = {}
                     
-                    # Get file info
-                    file_path = Path(output_path)
-                    stored_filename = file_path.name
-                    original_name = stored_filename.split('_')[0] if '_' in stored_filename else stored_filename
-                    mime_type, _ = mimetypes.guess_type(output_path)
-                    file_size = file_path.stat().st_size if file_path.exists() else 0
+                    # Sizes as reported by the worker; stat only what it did not report
+                    sizes = dict(rq_status["result"].get("output_sizes") or {})
+                    unsized = [path for path in new_paths if path not in sizes]
+                    if unsized:
+                        stats = await asyncio.to_thread(
+                            lambda: [file_service.stat_file(path) for path in unsized]
+                        )
+                        sizes.update(
+                            (path, stat.st_size) for path, stat in zip(unsized, stats) if stat
+                        )
                     
-                    # Create Image record
-                    new_image = Image(
-                        user_id=user_id,
-                        original_filename=f"processed_{original_name}",
-                        stored_filename=stored_filename,
-                        file_path=output_path,
-                        thumbnail_path=thumbnail_path,
-                        mime_type=mime_type or "application/octet-stream",
-                        file_size=file_size,
-                    )
-                    db.add(new_image)
+                    new_images = []
+                    for output_path in new_paths:
+                        output_file = Path(output_path)
+                        stored_filename = output_file.name
+                        original_name = stored_filename.split('_')[0] if '_' in stored_filename else stored_filename
+                        
+                        new_images.append(Image(
+                            user_id=user_id,
+                            original_filename=f"processed_{original_name}",
+                            stored_filename=stored_filename,
+                            file_path=output_path,
+                            thumbnail_path=thumbnails.get(output_path),
+                            mime_type=mime_for(output_file.suffix),
+                            file_size=sizes.get(output_path, 0),
+                        ))
+                    db.add_all(new_images)
                 
         elif rq_status["status"] == "failed":
             job.status = JobStatus.FAILED
@@ -221,20 +274,7 @@ async def get_job(
         
         await db.commit()
     
-    return JobDetailResponse(
-        id=job.id,
-        job_id=job.job_id,
-        operation=job.operation,
-        status=job.status,
-        progress=job.progress,
-        error_message=job.error_message,
-        input_files=job.input_files or [],
-        output_files=job.output_files or [],
-        created_at=job.created_at,
-        started_at=job.started_at,
-        completed_at=job.completed_at,
-        parameters=job.parameters or {}
-    )
+    return _job_detail(job)
 
 
 @router.post("/jobs/{job_id}/cancel")
@@ -244,15 +284,22 @@ async def cancel_job(
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
     """Cancel a pending job"""
-    query = select(Job).where(Job.job_id == job_id)
-    
-    result = await db.execute(query)
-    job = result.scalar_one_or_none()
-    
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
+    # Check and update in one atomic statement, so a job finishing
+    # concurrently cannot be flipped to cancelled
+    result = await db.execute(
+        update(Job)
+        .where(
+            Job.job_id == job_id,
+            Job.status.in_([JobStatus.PENDING, JobStatus.PROCESSING])
+        )
+        .values(status=JobStatus.CANCELLED, completed_at=UTC_NOW)
+        .returning(Job.id)
+        .execution_options(synchronize_session=False)
+    )
     
-    if job.status not in [JobStatus.PENDING, JobStatus.PROCESSING]:
+    if result.scalar_one_or_none() is None:
+        if await db.scalar(select(Job.id).where(Job.job_id == job_id)) is None:
+            raise HTTPException(status_code=404, detail="Job not found")
         raise HTTPException(
             status_code=400, 
             detail="Can only cancel pending or processing jobs"
@@ -261,9 +308,6 @@ async def cancel_job(
     # Cancel in RQ
     queue_service.cancel_job(job_id)
     
-    # Update database
-    job.status = JobStatus.CANCELLED
-    job.completed_at = datetime.utcnow()
     await db.commit()
     
     return {"message": "Job cancelled successfully"}
@@ -290,8 +334,11 @@ async def download_job_results(
     if not job.output_files:
         raise HTTPException(status_code=404, detail="No output files")
     
-    # Filter existing files
-    existing_files = [f for f in job.output_files if Path(f).exists()]
+    # Filter existing files (one thread hop for all the stats)
+    output_files = job.output_files
+    stats = await asyncio.to_thread(lambda: [file_service.stat_file(f) for f in output_files])
+    existing = [(f, stat) for f, stat in zip(output_files, stats) if stat is not None]
+    existing_files = [f for f, _ in existing]
     
     if not existing_files:
         raise HTTPException(status_code=404, detail="Output files not found on disk")
@@ -301,36 +348,19 @@ async def download_job_results(
         file_path = existing_files[0]
         path = Path(file_path)
         
-        # Determine mime type from extension
-        ext_to_mime = {
-            '.png': 'image/png',
-            '.jpg': 'image/jpeg',
-            '.jpeg': 'image/jpeg',
-            '.webp': 'image/webp',
-            '.gif': 'image/gif',
-            '.avif': 'image/avif',
-            '.pdf': 'application/pdf',
-        }
-        mime_type = ext_to_mime.get(path.suffix.lower(), 'application/octet-stream')
-        
+        # Job outputs are also registered as images, so the file is kept
         return FileResponse(
             file_path,
-            media_type=mime_type,
-            filename=path.name
+            media_type=mime_for(path.suffix),
+            filename=path.name,
+            stat_result=existing[0][1]
         )
     
-    # Multiple files - create ZIP
-    zip_buffer = io.BytesIO()
-    
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-        for file_path in existing_files:
-            path = Path(file_path)
-            zf.write(file_path, path.name)
-    
-    zip_buffer.seek(0)
+    # Multiple files - stream the ZIP as it is built instead of buffering it
+    files = [(file_path, Path(file_path).name) for file_path in existing_files]
     
     return StreamingResponse(
-        zip_buffer,
+        file_service.aiter_zip(files),
         media_type="application/zip",
         headers={"Content-Disposition": f"attachment; filename=processed_{job_id[:8]}.zip"}
     )
@@ -356,20 +386,22 @@ async def download_single_file(
         raise HTTPException(status_code=404, detail="File not found")
     
     file_path = job.output_files[index]
-    path = Path(file_path)
     
-    if not path.exists():
+    stat = await asyncio.to_thread(file_service.stat_file, file_path)
+    if stat is None:
         raise HTTPException(status_code=404, detail="File not found on disk")
     
     return FileResponse(
         file_path,
-        filename=path.name
+        filename=Path(file_path).name,
+        stat_result=stat
     )
 
 
 @router.delete("/jobs/{job_id}")
 async def delete_job(
     job_id: str,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
@@ -385,15 +417,23 @@ async def delete_job(
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    # Delete output files
-    if job.output_files:
-        for file_path in job.output_files:
-            path = Path(file_path)
-            if path.exists():
-                path.unlink()
+    output_files = job.output_files or []
+    
+    # Images pointing at those files must not be reused as editor results
+    if output_files:
+        await db.execute(
+            update(Image)
+            .where(Image.file_path.in_(output_files))
+            .values(cache_key=None)
+            .execution_options(synchronize_session=False)
+        )
     
     # Delete job record
     await db.delete(job)
     await db.commit()
     
+    # Unlink output files in the threadpool after the response has been sent
+    if output_files:
+        background_tasks.add_task(file_service.delete_files, output_files)
+    
     return {"message": "Job deleted successfully"}
@@ -4,30 +4,40 @@ Settings API for user preferences
 
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
 from app.core.database import get_db
-from app.core.security import get_current_user, get_current_user_optional
-from app.core.config import settings as app_settings
+from app.core.security import forget_cached_user, get_current_user, get_current_user_optional
+from app.core.config import Settings, get_settings as get_app_settings
+from app.core.responses import ORJSONResponse
 from app.models.user import User
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
-# Default settings - use values from config
-DEFAULT_SETTINGS = {
-    "theme": "system",
-    "max_upload_size_mb": app_settings.max_upload_size_mb,
-    "default_quality": app_settings.default_quality,
-    "default_format": app_settings.default_output_format,
-    "max_parallel_jobs": 5,
-    "delete_originals": False,
-    "auto_download": True,
-}
+
+def default_settings(config: Settings) -> dict:
+    """Default user settings - use values from config"""
+    return {
+        "theme": "system",
+        "max_upload_size_mb": config.max_upload_size_mb,
+        "default_quality": config.default_quality,
+        "default_format": config.default_output_format,
+        "max_parallel_jobs": 5,
+        "delete_originals": False,
+        "auto_download": True,
+    }
+
+
+ALLOWED_THEMES = frozenset({"light", "dark", "system"})
+ALLOWED_FORMATS = frozenset({"webp", "avif", "jpeg", "jpg", "png", "gif"})
 
 
 class UserSettingsRequest(BaseModel):
+    # Plain validation: unknown keys dropped, no ORM or assignment hooks
+    model_config = ConfigDict(extra="ignore")
+    
     theme: Optional[str] = None  # light, dark, system
     max_upload_size_mb: Optional[int] = Field(None, ge=1, le=500)
     default_quality: Optional[int] = Field(None, ge=1, le=100)
@@ -38,6 +48,8 @@ class UserSettingsRequest(BaseModel):
 
 
 class UserSettingsResponse(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
     theme: str
     max_upload_size_mb: int
     default_quality: int
@@ -48,9 +60,23 @@ class UserSettingsResponse(BaseModel):
     require_login: bool  # Read-only, from .env
 
 
+def _settings_response(settings: dict, config: Settings) -> UserSettingsResponse:
+    """
+    Stored settings over the defaults; require_login always from config.
+    Stored values were validated by UserSettingsRequest on the way in, so
+    the response is constructed without validating them again.
+    """
+    return UserSettingsResponse.model_construct(**{
+        **default_settings(config),
+        **settings,
+        "require_login": config.require_login,
+    })
+
+
 @router.get("/", response_model=UserSettingsResponse)
 async def get_settings(
-    current_user: Optional[User] = Depends(get_current_user_optional)
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    config: Settings = Depends(get_app_settings)
 ):
     """Get current user settings (or defaults if not logged in)"""
     if current_user:
@@ -58,36 +84,29 @@ async def get_settings(
     else:
         settings = {}
     
-    return UserSettingsResponse(
-        theme=settings.get("theme", DEFAULT_SETTINGS["theme"]),
-        max_upload_size_mb=settings.get("max_upload_size_mb", DEFAULT_SETTINGS["max_upload_size_mb"]),
-        default_quality=settings.get("default_quality", DEFAULT_SETTINGS["default_quality"]),
-        default_format=settings.get("default_format", DEFAULT_SETTINGS["default_format"]),
-        max_parallel_jobs=settings.get("max_parallel_jobs", DEFAULT_SETTINGS["max_parallel_jobs"]),
-        delete_originals=settings.get("delete_originals", DEFAULT_SETTINGS["delete_originals"]),
-        auto_download=settings.get("auto_download", DEFAULT_SETTINGS["auto_download"]),
-        require_login=app_settings.require_login,  # Always from config
-    )
+    return _settings_response(settings, config)
 
 
 @router.put("/", response_model=UserSettingsResponse)
 async def update_settings(
     request: UserSettingsRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user_optional)
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    config: Settings = Depends(get_app_settings)
 ):
     """Update user settings (requires authentication to persist)"""
     if not current_user:
+        defaults = default_settings(config)
         # Return the requested settings without persisting
         return UserSettingsResponse(
-            theme=request.theme or DEFAULT_SETTINGS["theme"],
-            max_upload_size_mb=request.max_upload_size_mb or DEFAULT_SETTINGS["max_upload_size_mb"],
-            default_quality=request.default_quality or DEFAULT_SETTINGS["default_quality"],
-            default_format=request.default_format or DEFAULT_SETTINGS["default_format"],
-            max_parallel_jobs=request.max_parallel_jobs or DEFAULT_SETTINGS["max_parallel_jobs"],
-            delete_originals=request.delete_originals if request.delete_originals is not None else DEFAULT_SETTINGS["delete_originals"],
-            auto_download=request.auto_download if request.auto_download is not None else DEFAULT_SETTINGS["auto_download"],
-            require_login=app_settings.require_login,
+            theme=request.theme or defaults["theme"],
+            max_upload_size_mb=request.max_upload_size_mb or defaults["max_upload_size_mb"],
+            default_quality=request.default_quality or defaults["default_quality"],
+            default_format=request.default_format or defaults["default_format"],
+            max_parallel_jobs=request.max_parallel_jobs or defaults["max_parallel_jobs"],
+            delete_originals=request.delete_originals if request.delete_originals is not None else defaults["delete_originals"],
+            auto_download=request.auto_download if request.auto_download is not None else defaults["auto_download"],
+            require_login=config.require_login,
         )
     
     # Get current settings
@@ -95,7 +114,7 @@ async def update_settings(
     
     # Update only provided fields
     if request.theme is not None:
-        if request.theme not in ["light", "dark", "system"]:
+        if request.theme not in ALLOWED_THEMES:
             raise HTTPException(status_code=400, detail="Invalid theme")
         settings["theme"] = request.theme
     
@@ -106,8 +125,7 @@ async def update_settings(
         settings["default_quality"] = request.default_quality
     
     if request.default_format is not None:
-        allowed_formats = ["webp", "avif", "jpeg", "jpg", "png", "gif"]
-        if request.default_format not in allowed_formats:
+        if request.default_format not in ALLOWED_FORMATS:
             raise HTTPException(status_code=400, detail="Invalid format")
         settings["default_format"] = request.default_format
     
@@ -124,17 +142,9 @@ async def update_settings(
     current_user.settings = settings
     current_user.updated_at = datetime.utcnow()
     await db.commit()
+    forget_cached_user(current_user.id)
     
-    return UserSettingsResponse(
-        theme=settings.get("theme", DEFAULT_SETTINGS["theme"]),
-        max_upload_size_mb=settings.get("max_upload_size_mb", DEFAULT_SETTINGS["max_upload_size_mb"]),
-        default_quality=settings.get("default_quality", DEFAULT_SETTINGS["default_quality"]),
-        default_format=settings.get("default_format", DEFAULT_SETTINGS["default_format"]),
-        max_parallel_jobs=settings.get("max_parallel_jobs", DEFAULT_SETTINGS["max_parallel_jobs"]),
-        delete_originals=settings.get("delete_originals", DEFAULT_SETTINGS["delete_originals"]),
-        auto_download=settings.get("auto_download", DEFAULT_SETTINGS["auto_download"]),
-        require_login=app_settings.require_login,
-    )
+    return _settings_response(settings, config)
 
 
 @router.post("/reset")
@@ -147,5 +157,6 @@ async def reset_settings(
         current_user.settings = {}
         current_user.updated_at = datetime.utcnow()
         await db.commit()
+        forget_cached_user(current_user.id)
     
     return {"message": "Settings reset to defaults"}
@@ -4,6 +4,8 @@ from app.core.database import engine, Base, get_db, async_session_maker
 from app.core.security import (
     verify_password, 
     get_password_hash, 
+    verify_password_async,
+    get_password_hash_async,
     create_access_token, 
     verify_token
 )
@@ -2,6 +2,7 @@
 Database configuration and async session management
 """
 
+from sqlalchemy import func
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
@@ -11,8 +12,10 @@ engine = create_async_engine(
     settings.database_url,
     echo=settings.debug,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_recycle=settings.db_pool_recycle,
+    query_cache_size=1200,
 )
 
 # Session factory
@@ -27,6 +30,10 @@ async_session_maker = async_sessionmaker(
 # Base class for models
 Base = declarative_base()
 
+# Current time evaluated by the database, as naive UTC like the
+# datetime.utcnow() values stored in the (timezone-less) DateTime columns
+UTC_NOW = func.timezone("utc", func.now())
+
 
 async def get_db() -> AsyncSession:
     """Dependency for getting database session"""
@@ -0,0 +1,51 @@
+"""
+Response classes shared by the API routers
+"""
+
+import mimetypes
+from functools import lru_cache
+from typing import Any, Mapping, Optional
+import orjson
+from fastapi.responses import JSONResponse, Response
+
+
+# Formats we produce that older mime.types files do not list
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("image/avif", ".avif")
+mimetypes.add_type("image/heic", ".heic")
+mimetypes.add_type("image/heif", ".heif")
+
+
+@lru_cache(maxsize=128)
+def mime_for(extension: str) -> str:
+    """MIME type for a file extension, with or without the leading dot"""
+    extension = extension.lower()
+    if not extension.startswith("."):
+        extension = f".{extension}"
+    return mimetypes.types_map.get(extension, "application/octet-stream")
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response serialized with orjson (native datetime support)"""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified_response(headers: Mapping[str, str]) -> Response:
+    """Empty 304 carrying the validator/caching headers of the full response"""
+    return Response(status_code=304, headers=dict(headers))
@@ -2,15 +2,22 @@
 Security utilities for authentication and authorization
 """
 
+import asyncio
+import copy
 import logging
+import os
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
 from jose import JWTError, jwt
 import bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy.orm import make_transient_to_detached
 
 from app.core.config import settings
 from app.core.database import get_db
@@ -20,19 +27,44 @@ logger = logging.getLogger(__name__)
 # Bearer token security
 security = HTTPBearer()
 
+# Argon2id hasher using the OWASP recommended parameters (46 MiB, t=1, p=1)
+password_hasher = PasswordHasher(
+    time_cost=1,
+    memory_cost=46 * 1024,
+    parallelism=1,
+)
+
+# Hashes created before the switch to Argon2id are bcrypt
+BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return bcrypt.checkpw(
-        plain_password.encode('utf-8'),
-        hashed_password.encode('utf-8')
-    )
+    """Verify a password against its hash (Argon2id, or legacy bcrypt)"""
+    if hashed_password.startswith(BCRYPT_PREFIXES):
+        return bcrypt.checkpw(
+            plain_password.encode('utf-8'),
+            hashed_password.encode('utf-8')
+        )
+    
+    try:
+        return password_hasher.verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        return False
 
 
 def get_password_hash(password: str) -> str:
-    """Hash a password"""
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+    """Hash a password with Argon2id"""
+    return password_hasher.hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password in a worker thread, keeping the event loop free"""
+    return await asyncio.to_thread(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash in a worker thread, keeping the event loop free"""
+    return await asyncio.to_thread(get_password_hash, password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -53,25 +85,76 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     )
 
 
-def verify_token(token: str) -> Optional[dict]:
-    """Verify and decode a JWT token"""
+@lru_cache(maxsize=4096)
+def _decode_token(token: str) -> Optional[dict]:
+    """Signature-checked payload of a token, None if invalid (memoized per token)"""
     try:
-        payload = jwt.decode(
+        return jwt.decode(
             token, 
             settings.jwt_secret, 
             algorithms=[settings.jwt_algorithm]
         )
-        return payload
     except JWTError:
         return None
 
 
+def verify_token(token: str) -> Optional[dict]:
+    """Verify and decode a JWT token"""
+    payload = _decode_token(token)
+    if payload is None:
+        return None
+    
+    # A cached decode may have expired since
+    exp = payload.get("exp")
+    if exp is not None and exp <= time.time():
+        return None
+    
+    return dict(payload)
+
+
+# Users resolved from tokens, by id: {user_id: (cached_at, column values)}.
+# Short-lived so changes made elsewhere show up quickly; writes through the
+# API drop the entry right away via forget_cached_user
+USER_CACHE_TTL = 5.0
+USER_CACHE_SIZE = 10_000
+_user_cache: Dict[int, Tuple[float, dict]] = {}
+
+
+async def _load_user(db: AsyncSession, user_id: int):
+    """Look up a user by id, from _user_cache when fresh"""
+    from app.models.user import User
+    
+    cached = _user_cache.get(user_id)
+    if cached and time.monotonic() - cached[0] < USER_CACHE_TTL:
+        user = User(**copy.deepcopy(cached[1]))
+        make_transient_to_detached(user)
+        # Attach without a SELECT so handler changes are still persisted
+        return await db.merge(user, load=False)
+    
+    user = await db.get(User, user_id)
+    
+    # No await between here and the insert, so no lock is needed
+    if user is not None:
+        if len(_user_cache) >= USER_CACHE_SIZE:
+            _user_cache.pop(next(iter(_user_cache)))
+        _user_cache[user_id] = (
+            time.monotonic(),
+            copy.deepcopy({column.key: getattr(user, column.key) for column in User.__table__.columns}),
+        )
+    
+    return user
+
+
+def forget_cached_user(user_id: int) -> None:
+    """Drop a user from _user_cache after it was changed"""
+    _user_cache.pop(user_id, None)
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
 ):
     """Get the current authenticated user"""
-    from app.models.user import User
     
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -89,8 +172,7 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
     
-    result = await db.execute(select(User).where(User.id == int(user_id)))
-    user = result.scalar_one_or_none()
+    user = await _load_user(db, int(user_id))
     
     if user is None:
         raise credentials_exception
@@ -105,40 +187,73 @@ async def get_current_user_optional(
     db: AsyncSession = Depends(get_db)
 ):
     """Get the current user if authenticated, None otherwise"""
-    from app.models.user import User
-    
-    logger.info(f"get_current_user_optional called, credentials: {credentials is not None}")
-    
+    # Runs on nearly every request: debug logging only, formatted lazily
     if credentials is None:
-        logger.info("No credentials provided")
         return None
     
     try:
-        token = credentials.credentials
-        logger.info(f"Token received: {token[:20]}..." if len(token) > 20 else f"Token: {token}")
-        
-        payload = verify_token(token)
-        logger.info(f"Token payload: {payload}")
+        payload = verify_token(credentials.credentials)
         
         if payload is None:
-            logger.info("Token verification failed")
+            logger.debug("Token verification failed")
             return None
         
         user_id: str = payload.get("sub")
         if user_id is None:
-            logger.info("No user_id in token")
+            logger.debug("No user_id in token")
             return None
         
-        logger.info(f"Looking up user_id: {user_id}")
-        result = await db.execute(select(User).where(User.id == int(user_id)))
-        user = result.scalar_one_or_none()
+        user = await _load_user(db, int(user_id))
         
-        if user:
-            logger.info(f"Found user: {user.email}")
-        else:
-            logger.info(f"User not found for id: {user_id}")
+        if user is None:
+            logger.debug("User not found for id: %s", user_id)
         
         return user
     except Exception as e:
         logger.error(f"Error in get_current_user_optional: {e}")
         return None
+
+
+# Security: Path validation
+ALLOWED_DIRS = [
+    os.path.realpath(settings.upload_dir),
+    os.path.realpath(settings.processed_dir),
+    os.path.realpath(settings.temp_dir),
+    '/app/uploads',
+    '/app/processed',
+    '/tmp'
+]
+
+# Resolved once at import; a trailing separator keeps "/tmpfoo" out of "/tmp"
+_ALLOWED_REAL = tuple(
+    os.path.join(os.path.realpath(allowed_dir), '')
+    for allowed_dir in ALLOWED_DIRS
+    if allowed_dir
+)
+
+
+def validate_path(file_path: str) -> str:
+    """
+    Validate that a file path is within allowed directories.
+    Prevents path traversal attacks.
+    Returns the validated absolute path or raises HTTPException.
+    The path is resolved on every call, so a symlink that is repointed
+    later is checked against its current target.
+    """
+    if not file_path:
+        raise HTTPException(status_code=400, detail="Invalid file path")
+    
+    # Resolve to absolute path
+    abs_path = os.path.realpath(file_path)
+    
+    # Check if path is within (or is) one of the allowed directories
+    is_allowed = any(
+        abs_path.startswith(allowed_dir) or abs_path + os.sep == allowed_dir
+        for allowed_dir in _ALLOWED_REAL
+    )
+    
+    if not is_allowed:
+        logger.warning(f"Path traversal attempt blocked: {file_path} -> {abs_path}")
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    return abs_path
@@ -1,7 +1,7 @@
 # Models module
 from app.models.user import User
-from app.models.image import Image
+from app.models.image import Image, ImageKind
 from app.models.job import Job, JobStatus
 from app.models.project import Project
 
-__all__ = ["User", "Image", "Job", "JobStatus", "Project"]
+__all__ = ["User", "Image", "ImageKind", "Job", "JobStatus", "Project"]
@@ -2,12 +2,40 @@
 Image database model
 """
 
+import os
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, BigInteger, JSON
+from typing import Optional
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, BigInteger, JSON, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 
+class ImageKind:
+    """Image kind constants"""
+    IMAGE = "image"
+    PDF = "pdf"
+    
+    @staticmethod
+    def for_file(mime_type: Optional[str], filename: Optional[str]) -> str:
+        """Classify a file by MIME type, falling back to its extension"""
+        if mime_type and 'pdf' in mime_type.lower():
+            return ImageKind.PDF
+        if filename and filename.lower().endswith('.pdf'):
+            return ImageKind.PDF
+        return ImageKind.IMAGE
+
+
+def _default_kind(context) -> str:
+    """Derive kind from the row being inserted, so every insert path sets it"""
+    params = context.get_current_parameters()
+    return ImageKind.for_file(params.get("mime_type"), params.get("original_filename"))
+
+
+def _default_file_extension(context) -> str:
+    """Extension of the stored file, e.g. ".png" ("" if it has none)"""
+    return os.path.splitext(context.get_current_parameters().get("file_path") or "")[1]
+
+
 class Image(Base):
     """Image model for uploaded files"""
     __tablename__ = "images"
@@ -21,6 +49,8 @@ class Image(Base):
     stored_filename = Column(String(500), nullable=False, unique=True)
     file_path = Column(String(1000), nullable=False)
     thumbnail_path = Column(String(1000), nullable=True)
+    file_extension = Column(String(20), nullable=True, default=_default_file_extension)
+    cache_key = Column(String(32), nullable=True, index=True)  # Source + operations hash of editor results
     
     # Metadata
     mime_type = Column(String(100), nullable=False)
@@ -28,6 +58,7 @@ class Image(Base):
     width = Column(Integer, nullable=True)
     height = Column(Integer, nullable=True)
     format = Column(String(50), nullable=True)
+    kind = Column(String(10), nullable=False, default=_default_kind, server_default=ImageKind.IMAGE)
     
     # Additional metadata from ImageMagick
     image_metadata = Column(JSON, default=dict)
@@ -36,9 +67,10 @@ class Image(Base):
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     expires_at = Column(DateTime, nullable=True, index=True)  # Auto-delete after this
     
-    # Relationships
-    user = relationship("User", back_populates="images")
-    project = relationship("Project", back_populates="images")
+    # Relationships; never lazy-loaded, so a listing cannot turn into a
+    # query per row (use selectinload when they are actually needed)
+    user = relationship("User", back_populates="images", lazy="raise")
+    project = relationship("Project", back_populates="images", lazy="raise")
     
     def __repr__(self):
         return f"<Image {self.original_filename}>"
@@ -52,3 +84,7 @@ class Image(Base):
                 return f"{size:.1f} {unit}"
             size /= 1024
         return f"{size:.1f} TB"
+
+
+# Image listing: a user's newest images first
+Index("ix_images_user_created", Image.user_id, Image.created_at.desc())
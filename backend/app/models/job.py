@@ -3,7 +3,7 @@ Job database model for queue management
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -20,7 +20,6 @@ class JobStatus:
 class Job(Base):
     """Job model for image processing queue"""
     __tablename__ = "jobs"
-    
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
     
@@ -63,3 +62,8 @@ class Job(Base):
     def is_finished(self) -> bool:
         """Check if job is finished (completed, failed, or cancelled)"""
         return self.status in [JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED]
+
+
+# Job history listing: newest first per user, optionally filtered by status
+Index("ix_jobs_user_created", Job.user_id, Job.created_at.desc())
+Index("ix_jobs_user_status_created", Job.user_id, Job.status, Job.created_at.desc())
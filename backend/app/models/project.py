@@ -4,9 +4,10 @@ Project model for organizing images into folders/collections
 
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, func, select
+from sqlalchemy.orm import column_property, relationship
 from app.core.database import Base
+from app.models.image import Image
 
 
 class Project(Base):
@@ -26,6 +27,13 @@ class Project(Base):
     user = relationship("User", back_populates="projects")
     images = relationship("Image", back_populates="project")
 
-    @property
-    def image_count(self):
-        return len(self.images) if self.images else 0
+    # Correlated COUNT over the images.project_id index instead of loading
+    # every image; deferred, so select it explicitly (or undefer) when needed
+    image_count = column_property(
+        select(func.count(Image.id))
+        .where(Image.project_id == id)
+        .correlate_except(Image)
+        .scalar_subquery(),
+        deferred=True,
+        expire_on_flush=False,
+    )
@@ -24,20 +24,29 @@ class AIService:
         self.temp_dir = Path(settings.temp_dir)
         self.temp_dir.mkdir(parents=True, exist_ok=True)
         self._rembg_available = None
+        self._rembg_probe_lock = asyncio.Lock()
         self._session = None
     
     async def is_available(self) -> bool:
-        """Check if rembg is available"""
+        """Check if rembg is available (probed once, then cached)"""
         if self._rembg_available is None:
-            try:
-                import rembg
-                self._rembg_available = True
-                logger.info("rembg is available")
-            except ImportError as e:
-                logger.error(f"rembg not available: {e}")
-                self._rembg_available = False
+            # Importing rembg pulls in onnxruntime and takes seconds; keep it
+            # off the event loop and let concurrent first callers share one probe
+            async with self._rembg_probe_lock:
+                if self._rembg_available is None:
+                    self._rembg_available = await asyncio.to_thread(self._probe_rembg)
         return self._rembg_available
     
+    @staticmethod
+    def _probe_rembg() -> bool:
+        try:
+            import rembg
+            logger.info("rembg is available")
+            return True
+        except ImportError as e:
+            logger.error(f"rembg not available: {e}")
+            return False
+    
     def _get_session(self, model: str = "u2net"):
         """Get or create rembg session"""
         if self._session is None:
@@ -2,13 +2,18 @@
 File handling service for uploads and downloads
 """
 
+import asyncio
+import io
 import os
+import shutil
+import stat
+import threading
 import uuid
 import zipfile
 import aiofiles
 import magic
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import AsyncIterator, BinaryIO, Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta
 from fastapi import UploadFile
 
@@ -16,9 +21,36 @@ from app.core.config import settings
 from app.services.imagemagick import imagemagick_service
 
 
+class _ZipStreamSink(io.RawIOBase):
+    """Write-only sink collecting the bytes ZipFile emits so they can be streamed out"""
+    
+    def __init__(self):
+        self._chunks: List[bytes] = []
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
 class FileService:
     """Service for handling file uploads and management"""
     
+    # Formats that are already compressed; deflating them again wastes CPU
+    PRECOMPRESSED_EXTENSIONS = frozenset({
+        ".jpg", ".jpeg", ".png", ".webp", ".gif", ".avif", ".heic", ".heif", ".pdf",
+    })
+    
+    ZIP_CHUNK_SIZE = 1024 * 1024
+    COPY_CHUNK_SIZE = 1024 * 1024
+    
     MIME_TYPE_MAP = {
         "image/jpeg": "jpg",
         "image/png": "png",
@@ -69,11 +101,10 @@ class FileService:
         if mime_type not in self.MIME_TYPE_MAP:
             return False, f"File type {mime_type} not allowed", None
         
-        # Check file size (read all to get size)
-        content = await file.read()
-        await file.seek(0)
-        
-        file_size = len(content)
+        # Check file size without reading the body into memory
+        file.file.seek(0, os.SEEK_END)
+        file_size = file.file.tell()
+        file.file.seek(0)
         max_size = settings.max_upload_size_mb * 1024 * 1024
         
         if file_size > max_size:
@@ -104,11 +135,41 @@ class FileService:
         file_path = save_dir / stored_filename
         
         # Save file
-        content = await file.read()
-        async with aiofiles.open(file_path, "wb") as f:
-            await f.write(content)
+        file_size = await asyncio.to_thread(self._copy_to_disk, file.file, str(file_path))
         
-        return stored_filename, str(file_path), len(content)
+        return stored_filename, str(file_path), file_size
+    
+    def _copy_to_disk(self, src: BinaryIO, dest_path: str) -> int:
+        """
+        Copy an upload body to dest_path without loading it into memory.
+        Sources backed by a real file are copied in-kernel with sendfile(2);
+        ones without a file descriptor (BytesIO and the like) via copyfileobj.
+        fileno() on an in-memory SpooledTemporaryFile rolls it over to disk
+        first; those are below the spool size, so the extra write is small.
+        Returns the number of bytes written.
+        """
+        src.seek(0)
+        
+        with open(dest_path, "wb") as dst:
+            try:
+                src_fd, dst_fd = src.fileno(), dst.fileno()
+            except (AttributeError, io.UnsupportedOperation):
+                src_fd = None
+            
+            if src_fd is not None:
+                try:
+                    offset = 0
+                    while sent := os.sendfile(dst_fd, src_fd, offset, self.COPY_CHUNK_SIZE):
+                        offset += sent
+                    return offset
+                except OSError:
+                    # sendfile unsupported for this pair; copy in Python
+                    src.seek(0)
+                    dst.seek(0)
+                    dst.truncate()
+            
+            shutil.copyfileobj(src, dst, self.COPY_CHUNK_SIZE)
+            return dst.tell()
     
     async def create_thumbnail(
         self,
@@ -147,6 +208,14 @@ class FileService:
         logger.warning(f"Thumbnail creation failed for {source_path}")
         return None
     
+    def stat_file(self, file_path: str) -> Optional[os.stat_result]:
+        """stat() a regular file; None if it is missing or not a file"""
+        try:
+            result = os.stat(file_path)
+        except OSError:
+            return None
+        return result if stat.S_ISREG(result.st_mode) else None
+    
     async def get_file(self, file_path: str) -> Optional[bytes]:
         """Read file contents"""
         path = Path(file_path)
@@ -158,11 +227,25 @@ class FileService:
     
     async def delete_file(self, file_path: str) -> bool:
         """Delete a file"""
-        path = Path(file_path)
-        if path.exists():
-            path.unlink()
+        try:
+            os.unlink(file_path)
             return True
-        return False
+        except FileNotFoundError:
+            return False
+    
+    def delete_files(self, file_paths: List[str]) -> int:
+        """
+        Delete several files, ignoring missing ones. Sync so it can run as a
+        background task in the threadpool. Returns the number deleted.
+        """
+        count = 0
+        for file_path in file_paths:
+            try:
+                os.unlink(file_path)
+                count += 1
+            except FileNotFoundError:
+                pass
+        return count
     
     async def create_zip(
         self,
@@ -185,6 +268,89 @@ class FileService:
         
         return str(zip_path)
     
+    def iter_zip(
+        self,
+        files: List[Tuple[str, str]]  # List of (file_path, archive_name)
+    ) -> Iterator[bytes]:
+        """
+        Generate a ZIP archive incrementally, one chunk at a time.
+        Memory use is bounded by ZIP_CHUNK_SIZE regardless of archive size.
+        Sync generator; aiter_zip drives it from a worker thread.
+        """
+        sink = _ZipStreamSink()
+        
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zf:
+            for file_path, archive_name in files:
+                try:
+                    info = zipfile.ZipInfo.from_file(file_path, archive_name)
+                except OSError:
+                    continue  # Missing on disk
+                ext = os.path.splitext(file_path)[1].lower()
+                info.compress_type = (
+                    zipfile.ZIP_STORED if ext in self.PRECOMPRESSED_EXTENSIONS
+                    else zipfile.ZIP_DEFLATED
+                )
+                
+                with open(file_path, "rb") as src, zf.open(info, "w", force_zip64=True) as dst:
+                    while chunk := src.read(self.ZIP_CHUNK_SIZE):
+                        dst.write(chunk)
+                        data = sink.drain()
+                        if data:
+                            yield data
+                
+                data = sink.drain()
+                if data:
+                    yield data
+        
+        # Central directory
+        yield sink.drain()
+    
+    async def aiter_zip(
+        self,
+        files: List[Tuple[str, str]]  # List of (file_path, archive_name)
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream iter_zip from a single worker thread.
+        The whole archive is built in one thread and chunks are handed over
+        through a small bounded queue, instead of hopping to the threadpool
+        for every chunk; the queue bound keeps memory flat on slow clients.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=4)
+        stop = threading.Event()
+        
+        def put(item) -> None:
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+        
+        def produce() -> None:
+            chunks = self.iter_zip(files)
+            try:
+                for chunk in chunks:
+                    if stop.is_set():
+                        return
+                    put(chunk)
+            except Exception as exc:
+                if not stop.is_set():
+                    put(exc)
+                return
+            finally:
+                chunks.close()
+            if not stop.is_set():
+                put(None)
+        
+        loop.run_in_executor(None, produce)
+        try:
+            while (item := await queue.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Client went away (or we are done): stop the producer and free
+            # the slot it may be blocked on
+            stop.set()
+            while not queue.empty():
+                queue.get_nowait()
+    
     async def cleanup_expired(self, hours: int = 24) -> int:
         """Clean up files older than specified hours"""
         count = 0
@@ -6,6 +6,7 @@ import os
 import re
 import shlex
 import asyncio
+import hashlib
 import subprocess
 from typing import List, Dict, Optional, Tuple
 from pathlib import Path
@@ -702,6 +703,106 @@ class ImageMagickService:
         logger.error(f"All thumbnail attempts failed for: {input_path}")
         return False
     
+    async def create_thumbnails(
+        self,
+        input_paths: List[str],
+        thumb_dir: str,
+        size: int = 300
+    ) -> Dict[str, Optional[str]]:
+        """
+        Create thumbnails for several images with a single ImageMagick process,
+        written to thumb_dir as <stem>_thumb.webp (first frame only).
+        PDFs, PNGs and anything the batch run failed on go through
+        create_thumbnail one by one.
+        Returns {input_path: thumbnail_path or None}
+        """
+        await asyncio.to_thread(os.makedirs, thumb_dir, exist_ok=True)
+        # <stem>_thumb.webp, or <stem>_<path hash>_thumb.webp for an input
+        # whose stem an earlier one already took
+        thumb_paths: Dict[str, str] = {}
+        plain_names = []
+        taken = set()
+        for path in input_paths:
+            if path in thumb_paths:
+                continue
+            name = Path(path).stem
+            if name in taken:
+                name = f"{name}_{hashlib.blake2b(path.encode(), digest_size=4).hexdigest()}"
+            else:
+                plain_names.append(path)
+            taken.add(name)
+            thumb_paths[path] = os.path.join(thumb_dir, f"{name}_thumb.webp")
+        
+        candidates = [path for path in plain_names if not path.lower().endswith(('.pdf', '.png'))]
+        # The batch names its outputs after the input stems, so only inputs
+        # with plain thumbnail names go through it; the rest use the fallback
+        batch = await asyncio.to_thread(lambda: [path for path in candidates if os.path.isfile(path)])
+        batch_done = set()
+        if len(batch) > 1:
+            # The thumbnail dir is shared, so a <stem>_thumb.webp may be left
+            # over from an earlier image; only outputs this run wrote count
+            before = await asyncio.to_thread(self._mtimes, [thumb_paths[path] for path in batch])
+            
+            cmd = await self._get_magick_cmd()
+            inputs = " ".join(shlex.quote(f"{path}[0]") for path in batch)
+            output_pattern = shlex.quote(os.path.join(thumb_dir, "%[filename:base]_thumb.webp"))
+            # +adjoin: one file per image, never a single animated WebP
+            command = (
+                f'{cmd} {inputs} -thumbnail "{size}x{size}>" -quality 85 '
+                f'-set filename:base "%t" +adjoin {output_pattern}'
+            )
+            await self.execute(command)
+            
+            after = await asyncio.to_thread(self._mtimes, [thumb_paths[path] for path in batch])
+            batch_done = {
+                path for path in batch
+                if after[thumb_paths[path]] is not None
+                and after[thumb_paths[path]] != before[thumb_paths[path]]
+            }
+        
+        results = {}
+        for path in input_paths:
+            thumb_path = thumb_paths[path]
+            if path in batch_done:
+                results[path] = thumb_path
+            elif await self.create_thumbnail(path, thumb_path, size):
+                results[path] = thumb_path
+            else:
+                results[path] = None
+        
+        return results
+    
+    async def create_output_thumbnails(self, output_paths: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Create thumbnails for processed files in a "thumbnails" directory next
+        to them, one batched ImageMagick call per directory.
+        Returns {output_path: thumbnail_path or None}
+        """
+        by_dir: Dict[str, List[str]] = {}
+        for output_path in output_paths:
+            thumb_dir = os.path.join(os.path.dirname(output_path), "thumbnails")
+            by_dir.setdefault(thumb_dir, []).append(output_path)
+        
+        thumbnails: Dict[str, Optional[str]] = {}
+        for thumb_dir, paths in by_dir.items():
+            thumbnails.update(await self.create_thumbnails(paths, thumb_dir, 300))
+        return thumbnails
+    
+    async def create_output_thumbnail(self, output_path: str) -> Optional[str]:
+        """Create the thumbnail for a single processed file"""
+        return (await self.create_output_thumbnails([output_path]))[output_path]
+    
+    @staticmethod
+    def _mtimes(paths: List[str]) -> Dict[str, Optional[int]]:
+        """Modification time (ns) of each path, None where it does not exist"""
+        mtimes = {}
+        for path in paths:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+    
     async def create_pdf_preview(
         self,
         input_path: str,
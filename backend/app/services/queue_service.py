@@ -2,14 +2,19 @@
 Queue service using Redis and RQ
 """
 
+import asyncio
 import redis
 from rq import Queue, Worker
-from rq.job import Job as RQJob
-from typing import Optional, List, Dict, Any
+from rq.job import Job as RQJob, JobStatus as RQJobStatus
+from rq.results import Result as RQResult
+from typing import Optional, List, Dict, Any, Tuple
 import uuid
 
 from app.core.config import settings
 
+# Statuses whose outcome is recorded as an rq Result
+_DONE_STATUSES = (RQJobStatus.FINISHED, RQJobStatus.FAILED)
+
 
 class QueueService:
     """Service for managing job queues with Redis and RQ"""
@@ -17,6 +22,8 @@ class QueueService:
     def __init__(self):
         self.redis_conn = redis.from_url(settings.redis_url)
         self.queue = Queue("imagemagick", connection=self.redis_conn)
+        # Editor requests wait on their result; the worker drains this queue first
+        self.interactive_queue = Queue("interactive", connection=self.redis_conn)
     
     def enqueue(
         self,
@@ -45,6 +52,69 @@ class QueueService:
         
         return job.id
     
+    async def run(
+        self,
+        func: callable,
+        *args,
+        job_id: str,
+        timeout: int = 60,
+        queue_timeout: int = 60,
+        poll_interval: float = 0.1,
+        **kwargs
+    ) -> Any:
+        """
+        Run a job on the interactive queue and wait for its return value.
+        Redis calls go through a worker thread and the wait is an
+        asyncio.sleep, so the event loop stays free while the worker runs it.
+        Raises RuntimeError if the job fails, and TimeoutError if no worker
+        picks it up within queue_timeout seconds or it does not finish
+        within timeout seconds of starting.
+        """
+        job = await asyncio.to_thread(
+            self.interactive_queue.enqueue,
+            func,
+            *args,
+            job_id=job_id,
+            job_timeout=timeout,
+            result_ttl=300,  # Read back right away, no need to keep it
+            failure_ttl=86400,
+            **kwargs
+        )
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + queue_timeout
+        started = False
+        while True:
+            status, value = await asyncio.to_thread(self._poll_job, job)
+            if status == RQJobStatus.FINISHED:
+                return value
+            if status in (RQJobStatus.FAILED, RQJobStatus.STOPPED, RQJobStatus.CANCELED):
+                raise RuntimeError(value or f"Job {status}")
+            
+            # Time spent waiting in the queue does not count against the job
+            if status == RQJobStatus.STARTED and not started:
+                started = True
+                deadline = loop.time() + timeout
+            if loop.time() > deadline:
+                await asyncio.to_thread(job.cancel)
+                raise TimeoutError(
+                    f"Job {job_id} did not finish within {timeout}s" if started
+                    else f"Job {job_id} was not picked up within {queue_timeout}s"
+                )
+            
+            await asyncio.sleep(poll_interval)
+    
+    @staticmethod
+    def _poll_job(job: RQJob) -> Tuple[Optional[str], Any]:
+        """Refresh a job and return (status, return value or last error line)"""
+        status = job.get_status(refresh=True)
+        if status == RQJobStatus.FINISHED:
+            return status, job.return_value(refresh=True)
+        if status == RQJobStatus.FAILED:
+            exc_info = job.exc_info or ""
+            return status, exc_info.strip().splitlines()[-1] if exc_info.strip() else None
+        return status, None
+    
     def get_job(self, job_id: str) -> Optional[RQJob]:
         """Get job by ID"""
         try:
@@ -55,19 +125,62 @@ class QueueService:
     def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
         """Get job status and details"""
         job = self.get_job(job_id)
-        
         if job is None:
             return None
         
+        status = job.get_status(refresh=False)
+        latest = job.latest_result() if status in _DONE_STATUSES else None
+        return self._status_dict(job, status, latest)
+    
+    def get_job_statuses(self, job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        get_job_status for several jobs at once: one pipelined round-trip for
+        the job hashes, plus one for the results of finished/failed jobs.
+        Jobs that no longer exist in Redis are left out.
+        """
+        if not job_ids:
+            return {}
+        
+        jobs = [
+            job for job in RQJob.fetch_many(job_ids, connection=self.redis_conn)
+            if job is not None
+        ]
+        statuses = {job.id: job.get_status(refresh=False) for job in jobs}
+        
+        # Read the latest result of every finished/failed job in one pipeline
+        latest: Dict[str, RQResult] = {}
+        done = [job for job in jobs if statuses[job.id] in _DONE_STATUSES]
+        if done:
+            with self.redis_conn.pipeline() as pipeline:
+                for job in done:
+                    pipeline.xrevrange(RQResult.get_key(job.id), "+", "-", count=1)
+                responses = pipeline.execute()
+            
+            for job, response in zip(done, responses):
+                if response:
+                    result_id, payload = response[0]
+                    latest[job.id] = RQResult.restore(
+                        job.id, result_id.decode(), payload,
+                        connection=self.redis_conn, serializer=job.serializer
+                    )
+        
+        return {
+            job.id: self._status_dict(job, statuses[job.id], latest.get(job.id))
+            for job in jobs
+        }
+    
+    @staticmethod
+    def _status_dict(job: RQJob, status: str, latest: Optional[RQResult]) -> Dict[str, Any]:
+        """Status and details of a freshly fetched job and its latest result"""
         return {
             "id": job.id,
-            "status": job.get_status(),
-            "result": job.result,
+            "status": status,
+            "result": latest.return_value if latest and latest.type == RQResult.Type.SUCCESSFUL else None,
             "meta": job.meta,
             "created_at": job.created_at.isoformat() if job.created_at else None,
             "started_at": job.started_at.isoformat() if job.started_at else None,
             "ended_at": job.ended_at.isoformat() if job.ended_at else None,
-            "exc_info": job.exc_info,
+            "exc_info": latest.exc_string if latest and latest.type == RQResult.Type.FAILED else None,
         }
     
     def cancel_job(self, job_id: str) -> bool:
@@ -27,6 +27,7 @@ def process_images(
         "success": [],
         "failed": [],
         "output_files": [],
+        "output_sizes": {},  # output path -> bytes, saves the API a stat per file
     }
     
     total = len(input_files)
@@ -76,9 +77,11 @@ def process_images(
             finally:
                 loop.close()
             
-            if success and Path(output_path).exists():
+            output_stat = file_service.stat_file(output_path) if success else None
+            if output_stat is not None:
                 results["success"].append(input_path)
                 results["output_files"].append(output_path)
+                results["output_sizes"][output_path] = output_stat.st_size
             else:
                 results["failed"].append({
                     "file": input_path,
@@ -114,6 +117,7 @@ def process_raw_command(
         "success": [],
         "failed": [],
         "output_files": [],
+        "output_sizes": {},  # output path -> bytes, saves the API a stat per file
     }
     
     total = len(input_files)
@@ -162,9 +166,11 @@ def process_raw_command(
             finally:
                 loop.close()
             
-            if success and Path(output_path).exists():
+            output_stat = file_service.stat_file(output_path) if success else None
+            if output_stat is not None:
                 results["success"].append(input_path)
                 results["output_files"].append(output_path)
+                results["output_sizes"][output_path] = output_stat.st_size
             else:
                 results["failed"].append({
                     "file": input_path,
@@ -200,6 +206,7 @@ def process_background_removal(
         "success": [],
         "failed": [],
         "output_files": [],
+        "output_sizes": {},  # output path -> bytes, saves the API a stat per file
     }
     
     total = len(input_files)
@@ -236,9 +243,11 @@ def process_background_removal(
                     )
                 )
                 
-                if result_path and Path(result_path).exists():
+                result_stat = file_service.stat_file(result_path) if result_path else None
+                if result_stat is not None:
                     results["success"].append(input_path)
                     results["output_files"].append(result_path)
+                    results["output_sizes"][result_path] = result_stat.st_size
                 else:
                     results["failed"].append({
                         "file": input_path,
@@ -260,3 +269,44 @@ def process_background_removal(
         job.save_meta()
     
     return results
+
+
+def process_upscale(
+    input_path: str,
+    output_path: str,
+    scale: int = 2,
+    method: str = "lanczos",
+) -> Dict[str, Any]:
+    """
+    Upscale a single image
+    Returns dict with output_files and the new width/height
+    """
+    from PIL import Image as PILImage
+    from app.services.ai_service import ai_service
+    
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    
+    try:
+        result_path = loop.run_until_complete(
+            ai_service.upscale(
+                input_path,
+                output_path,
+                scale=scale,
+                method=method
+            )
+        )
+    finally:
+        loop.close()
+    
+    if not result_path or not Path(result_path).exists():
+        raise RuntimeError("Upscaling failed - no result file")
+    
+    with PILImage.open(result_path) as img:
+        width, height = img.size
+    
+    return {
+        "output_files": [result_path],
+        "width": width,
+        "height": height,
+    }
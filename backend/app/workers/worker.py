@@ -3,7 +3,7 @@ RQ Worker for processing ImageMagick jobs
 """
 
 import redis
-from rq import Worker, Queue, Connection
+from rq import Worker, SimpleWorker, Queue, Connection
 import sys
 import os
 
@@ -13,17 +13,35 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from app.core.config import settings
 
 
-def run_worker():
-    """Start the RQ worker"""
+def run_worker(interactive: bool = False):
+    """
+    Start an RQ worker.
+    The default worker forks a child per job and serves batch jobs (and
+    editor requests when it is idle). Interactive workers serve only editor
+    requests, in-process via SimpleWorker, so per-process state such as the
+    rembg session is loaded once rather than per job.
+    """
     redis_conn = redis.from_url(settings.redis_url)
     
     with Connection(redis_conn):
+        if interactive:
+            worker = SimpleWorker(
+                queues=[Queue("interactive", connection=redis_conn)],
+                connection=redis_conn,
+            )
+            worker.work()
+            return
+        
         worker = Worker(
-            queues=[Queue("imagemagick", connection=redis_conn)],
+            # Listed first so editor requests are not stuck behind batch jobs
+            queues=[
+                Queue("interactive", connection=redis_conn),
+                Queue("imagemagick", connection=redis_conn),
+            ],
             connection=redis_conn,
         )
         worker.work(with_scheduler=True)
 
 
 if __name__ == "__main__":
-    run_worker()
+    run_worker(interactive="--interactive" in sys.argv[1:])
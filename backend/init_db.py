@@ -11,10 +11,29 @@ from pathlib import Path
 # Add backend to path
 sys.path.insert(0, str(Path(__file__).parent))
 
+from sqlalchemy import text
+
 from app.core.database import engine, Base
 from app.models import user, image, job, project  # Import all models
 
 
+# Schema changes made after tables were first created. create_all() never
+# alters existing tables, so these run (idempotently) on every start.
+SCHEMA_UPGRADES = [
+    "ALTER TABLE images ADD COLUMN IF NOT EXISTS kind VARCHAR(10) NOT NULL DEFAULT 'image'",
+    "UPDATE images SET kind = 'pdf' WHERE kind = 'image' "
+    "AND (mime_type ILIKE '%pdf%' OR original_filename ILIKE '%.pdf')",
+    "ALTER TABLE images ADD COLUMN IF NOT EXISTS file_extension VARCHAR(20)",
+    "UPDATE images SET file_extension = coalesce(substring(file_path from '\\.[^./]*$'), '') "
+    "WHERE file_extension IS NULL",
+    "ALTER TABLE images ADD COLUMN IF NOT EXISTS cache_key VARCHAR(32)",
+    "CREATE INDEX IF NOT EXISTS ix_images_cache_key ON images (cache_key)",
+    "CREATE INDEX IF NOT EXISTS ix_images_user_created ON images (user_id, created_at DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_jobs_user_created ON jobs (user_id, created_at DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_jobs_user_status_created ON jobs (user_id, status, created_at DESC)",
+]
+
+
 async def init_db():
     """Initialize database tables"""
     print("🔧 Initializing database...")
@@ -25,6 +44,10 @@ async def init_db():
             async with engine.begin() as conn:
                 # Create all tables
                 await conn.run_sync(Base.metadata.create_all)
+                
+                # Bring existing tables up to date
+                for statement in SCHEMA_UPGRADES:
+                    await conn.execute(text(statement))
             print("✅ Database tables created successfully!")
             return True
         except Exception as e:
@@ -3,10 +3,37 @@ Tests for ImageMagick WebGUI Backend
 """
 
 import pytest
+import pytest_asyncio
 import asyncio
+import shutil
 from pathlib import Path
 from httpx import AsyncClient, ASGITransport
 
+
+@pytest_asyncio.fixture
+async def db_session():
+    """Async session on an in-memory SQLite database with the app's tables"""
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from app.core.database import Base
+    import app.models  # noqa: F401  (registers the tables)
+    
+    engine = create_async_engine("sqlite+aiosqlite://")
+    
+    @event.listens_for(engine.sync_engine, "connect")
+    def _add_timezone(dbapi_conn, _):
+        # SQLite stand-in for PostgreSQL's timezone() used by UTC_NOW
+        dbapi_conn.create_function("timezone", 2, lambda zone, ts: ts)
+    
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        yield session
+    
+    await engine.dispose()
+
+
 # Test ImageMagick Service
 class TestImageMagickService:
     """Tests for ImageMagick service"""
@@ -57,6 +84,101 @@ class TestImageMagickService:
             result = imagemagick_service.sanitize_filename(input_name)
             assert result == expected, f"Expected {expected}, got {result}"
 
+    
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(
+        not (shutil.which("magick") or shutil.which("convert")),
+        reason="ImageMagick not installed"
+    )
+    async def test_create_thumbnails_one_file_per_input(self, tmp_path):
+        """A batched thumbnail run writes a separate thumbnail for every input"""
+        from PIL import Image as PILImage
+        from app.services.imagemagick import imagemagick_service
+        
+        inputs = []
+        for name, color in [("first", "red"), ("second", "green"), ("third", "blue")]:
+            path = tmp_path / f"{name}.jpg"
+            PILImage.new("RGB", (640, 480), color).save(path)
+            inputs.append(str(path))
+        
+        thumb_dir = tmp_path / "thumbnails"
+        results = await imagemagick_service.create_thumbnails(inputs, str(thumb_dir), 100)
+        
+        assert sorted(p.name for p in thumb_dir.iterdir()) == [
+            "first_thumb.webp", "second_thumb.webp", "third_thumb.webp"
+        ]
+        for path in inputs:
+            assert results[path] == str(thumb_dir / f"{Path(path).stem}_thumb.webp")
+    
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(
+        not (shutil.which("magick") or shutil.which("convert")),
+        reason="ImageMagick not installed"
+    )
+    async def test_create_thumbnails_same_stem(self, tmp_path):
+        """Inputs sharing a file name still get a thumbnail each"""
+        from PIL import Image as PILImage
+        from app.services.imagemagick import imagemagick_service
+        
+        inputs = []
+        for folder, color in [("a", "red"), ("b", "green"), ("c", "blue")]:
+            (tmp_path / folder).mkdir()
+            path = tmp_path / folder / "photo.jpg"
+            PILImage.new("RGB", (640, 480), color).save(path)
+            inputs.append(str(path))
+        
+        thumb_dir = tmp_path / "thumbnails"
+        results = await imagemagick_service.create_thumbnails(inputs, str(thumb_dir), 100)
+        
+        thumbnails = [results[path] for path in inputs]
+        assert all(thumbnails) and len(set(thumbnails)) == len(inputs)
+        assert len(list(thumb_dir.iterdir())) == len(inputs)
+    
+    @pytest.mark.asyncio
+    async def test_create_thumbnails_ignores_stale_output(self, tmp_path, monkeypatch):
+        """A thumbnail left over from an earlier run is not taken as this batch's output"""
+        import os
+        from app.services.imagemagick import imagemagick_service
+        
+        inputs = []
+        for name in ("first", "second"):
+            path = tmp_path / f"{name}.jpg"
+            path.write_bytes(b"jpeg")
+            inputs.append(str(path))
+        
+        thumb_dir = tmp_path / "thumbnails"
+        thumb_dir.mkdir()
+        stale = thumb_dir / "first_thumb.webp"
+        stale.write_bytes(b"stale")
+        os.utime(stale, (0, 0))
+        
+        # The batch only manages the second image
+        async def execute(command):
+            (thumb_dir / "second_thumb.webp").write_bytes(b"fresh")
+            return False, "", "first.jpg: corrupt image"
+        
+        fallback = []
+        async def create_thumbnail(input_path, output_path, size=300):
+            fallback.append(input_path)
+            Path(output_path).write_bytes(b"fresh")
+            return True
+        
+        async def get_magick_cmd():
+            return "magick"
+        
+        monkeypatch.setattr(imagemagick_service, "execute", execute)
+        monkeypatch.setattr(imagemagick_service, "create_thumbnail", create_thumbnail)
+        monkeypatch.setattr(imagemagick_service, "_get_magick_cmd", get_magick_cmd)
+        
+        results = await imagemagick_service.create_thumbnails(inputs, str(thumb_dir), 100)
+        
+        assert fallback == [inputs[0]]
+        assert stale.read_bytes() == b"fresh"
+        assert results == {
+            inputs[0]: str(stale),
+            inputs[1]: str(thumb_dir / "second_thumb.webp"),
+        }
+
 
 class TestFileService:
     """Tests for file service"""
@@ -75,6 +197,78 @@ class TestFileService:
         # Should have correct extension
         assert path1.endswith(".png")
         assert path2.endswith(".png")
+    
+    def test_copy_to_disk(self, tmp_path):
+        """Uploads are copied whole, in memory or spooled to disk"""
+        import io
+        import tempfile
+        from app.services.file_service import file_service
+        
+        sources = {
+            "memory": io.BytesIO(b"a" * 100),
+            "small": tempfile.SpooledTemporaryFile(max_size=1024),
+            "large": tempfile.SpooledTemporaryFile(max_size=1024),
+        }
+        sources["small"].write(b"b" * 100)
+        sources["large"].write(b"c" * 5000)
+        
+        for name, src in sources.items():
+            src.seek(0)
+            expected = src.read()
+            src.seek(0, io.SEEK_END)  # _copy_to_disk must rewind itself
+            dest = tmp_path / name
+            assert file_service._copy_to_disk(src, str(dest)) == len(expected)
+            assert dest.read_bytes() == expected
+    
+    @pytest.mark.asyncio
+    async def test_aiter_zip_builds_valid_archive(self, tmp_path):
+        """Streamed ZIPs reopen cleanly; compressed formats are stored as is"""
+        import io
+        import os
+        import zipfile
+        from app.services.file_service import file_service
+        
+        photo = tmp_path / "photo.png"
+        photo.write_bytes(os.urandom(3 * 1024 * 1024))  # Spans several chunks
+        scan = tmp_path / "scan.bmp"
+        scan.write_bytes(b"\x00" * 100_000)
+        
+        files = [
+            (str(photo), "photo.png"),
+            (str(tmp_path / "missing.jpg"), "missing.jpg"),
+            (str(scan), "scan.bmp"),
+        ]
+        data = b"".join([chunk async for chunk in file_service.aiter_zip(files)])
+        
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            assert zf.testzip() is None
+            assert zf.namelist() == ["photo.png", "scan.bmp"]
+            assert zf.read("photo.png") == photo.read_bytes()
+            assert zf.getinfo("photo.png").compress_type == zipfile.ZIP_STORED
+            assert zf.getinfo("scan.bmp").compress_type == zipfile.ZIP_DEFLATED
+    
+    @pytest.mark.asyncio
+    async def test_aiter_zip_stops_producer_on_close(self, monkeypatch):
+        """Closing the stream early (client gone) stops the zip thread"""
+        import threading
+        from app.services.file_service import file_service
+        
+        closed = threading.Event()
+        
+        def endless_zip(files):
+            try:
+                while True:
+                    yield b"chunk"
+            finally:
+                closed.set()
+        
+        monkeypatch.setattr(file_service, "iter_zip", endless_zip)
+        
+        stream = file_service.aiter_zip([])
+        assert await stream.__anext__() == b"chunk"
+        await stream.aclose()
+        
+        assert await asyncio.to_thread(closed.wait, 5)
 
 
 class TestSecurityFunctions:
@@ -123,6 +317,267 @@ class TestSecurityFunctions:
             result = verify_token(token)
             assert result is None, f"Token should be invalid: {token}"
 
+    def test_password_strength(self):
+        """Test password strength rules"""
+        from app.api.auth import validate_password_strength
+
+        assert validate_password_strength("Str0ng!pass") == (True, "")
+
+        weak_passwords = [
+            ("Sh0rt!", "at least 8 characters"),
+            ("UPPER0NLY!", "lowercase letter"),
+            ("lower0nly!", "uppercase letter"),
+            ("NoDigits!!", "digit"),
+            ("NoSpecial00", "special character"),
+        ]
+
+        for password, expected in weak_passwords:
+            is_valid, error = validate_password_strength(password)
+            assert not is_valid, f"Password should be rejected: {password}"
+            assert expected in error, f"Unexpected error for {password}: {error}"
+
+    def test_validate_path_follows_symlink_changes(self, tmp_path):
+        """A repointed symlink is checked against its new target"""
+        from fastapi import HTTPException
+        from app.core.security import validate_path
+
+        target = tmp_path / "image.png"
+        target.write_bytes(b"png")
+        link = tmp_path / "link.png"
+        link.symlink_to(target)
+        assert validate_path(str(link)) == str(target.resolve())
+
+        link.unlink()
+        link.symlink_to("/etc/hostname")
+        with pytest.raises(HTTPException) as exc_info:
+            validate_path(str(link))
+        assert exc_info.value.status_code == 403
+
+
+
+class TestOperations:
+    """Tests for operation helpers"""
+    
+    def test_operation_type_priority(self):
+        """Combined operations are labelled by the highest-priority one"""
+        from app.api.operations import _operation_type
+        
+        cases = [
+            ([{"operation": "resize"}, {"operation": "crop"}], "crop"),
+            ([{"operation": "grayscale"}, {"operation": "modulate"}], "adjustments"),
+            ([{"operation": "rotate"}, {"operation": "resize"}], "rotate"),
+            ([{"operation": "sepia-tone"}, {"operation": "auto-level"}], "filter"),
+            ([{"operation": "resize"}], "resize"),
+            ([{"operation": "unknown"}], "edit"),
+            ([], "edit"),
+        ]
+        
+        for operations, expected in cases:
+            assert _operation_type(operations) == expected, f"Unexpected label for {operations}"
+    
+    @pytest.mark.asyncio
+    async def test_live_preview_without_operations(self, db_session, tmp_path):
+        """The unchanged original is a data URI unless the URL is asked for"""
+        from app.api.operations import LivePreviewRequest, live_preview
+        from app.models.image import Image
+        
+        path = tmp_path / "photo.png"
+        path.write_bytes(b"png")
+        image = Image(
+            original_filename="photo.png",
+            stored_filename="photo.png",
+            file_path=str(path),
+            mime_type="image/png",
+            file_size=3,
+        )
+        db_session.add(image)
+        await db_session.commit()
+        
+        request = LivePreviewRequest(image_id=image.id, operations=[])
+        response = await live_preview(request, db=db_session, current_user=None)
+        assert response["preview"] == "data:image/png;base64,cG5n"
+        
+        response = await live_preview(request, as_url=True, db=db_session, current_user=None)
+        assert response["preview"] == f"/api/images/{image.id}"
+
+
+class TestEditCache:
+    """Tests for reusing identical editor results"""
+    
+    @pytest.mark.asyncio
+    async def test_cached_edit_hit_and_miss(self, db_session, tmp_path):
+        """A stored result is reused only while its file exists"""
+        from sqlalchemy import select
+        from app.api.operations import _cached_edit, _edit_cache_key
+        from app.models.image import Image
+        
+        cache_key = _edit_cache_key(1, [{"operation": "resize", "params": {"width": 100}}], "webp")
+        assert await _cached_edit(db_session, cache_key, None) is None
+        
+        output = tmp_path / "edited.webp"
+        output.write_bytes(b"webp")
+        image = Image(
+            original_filename="edited.webp",
+            stored_filename="edited.webp",
+            file_path=str(output),
+            mime_type="image/webp",
+            file_size=4,
+            cache_key=cache_key,
+        )
+        db_session.add(image)
+        await db_session.commit()
+        
+        hit = await _cached_edit(db_session, cache_key, None)
+        assert hit["image_id"] == image.id
+        
+        # Different parameters or another owner do not match
+        other_key = _edit_cache_key(1, [{"operation": "resize", "params": {"width": 200}}], "webp")
+        assert await _cached_edit(db_session, other_key, None) is None
+        assert await _cached_edit(db_session, cache_key, 42) is None
+        
+        # Once the file is gone the edit has to run again
+        output.unlink()
+        assert await _cached_edit(db_session, cache_key, None) is None
+        assert await db_session.scalar(select(Image.cache_key).where(Image.id == image.id)) is None
+
+
+
+class TestQueueService:
+    """Tests for the RQ queue service"""
+    
+    def test_get_job_statuses_matches_single_lookup(self, monkeypatch):
+        """
+        The batched lookup reads every result in one pipeline and rebuilds
+        it with Result.get_key/Result.restore; this pins that against the
+        installed rq and checks it agrees with get_job_status.
+        """
+        import fakeredis
+        from rq import Queue, SimpleWorker
+        from rq.results import Result
+        from app.services.queue_service import QueueService
+        
+        service = QueueService.__new__(QueueService)
+        service.redis_conn = fakeredis.FakeStrictRedis()
+        queue = Queue("imagemagick", connection=service.redis_conn)
+        ok = queue.enqueue("math.sqrt", 4, job_id="ok")
+        failed = queue.enqueue("math.sqrt", -1, job_id="failed")
+        SimpleWorker([queue], connection=service.redis_conn).work(burst=True)
+        queued = queue.enqueue("math.sqrt", 9, job_id="queued")
+        
+        expected = {
+            job.id: service.get_job_status(job.id) for job in (ok, failed, queued)
+        }
+        
+        # Results must come from the pipelined read, not one fetch per job
+        def fetch_latest(*args, **kwargs):
+            raise AssertionError("result fetched outside the pipeline")
+        monkeypatch.setattr(Result, "fetch_latest", fetch_latest)
+        
+        statuses = service.get_job_statuses(["ok", "failed", "queued", "missing"])
+        
+        assert statuses == expected
+        assert statuses["ok"]["result"] == 2.0
+        assert "ValueError" in statuses["failed"]["exc_info"]
+        assert statuses["queued"]["result"] is None
+
+
+
+class TestImageCaching:
+    """Tests for conditional image requests"""
+    
+    def test_etag_matches(self):
+        """If-None-Match uses weak comparison and accepts lists and *"""
+        from app.core.responses import etag_matches
+        
+        assert etag_matches('W/"1-10"', 'W/"1-10"')
+        assert etag_matches('"1-10"', 'W/"1-10"')
+        assert etag_matches('"0-1", W/"1-10"', 'W/"1-10"')
+        assert etag_matches("*", 'W/"1-10"')
+        assert not etag_matches('W/"1-11"', 'W/"1-10"')
+        assert not etag_matches(None, 'W/"1-10"')
+    
+    @pytest.mark.asyncio
+    async def test_get_image_not_modified(self, db_session, tmp_path):
+        """A matching If-None-Match gets an empty 304 with the caching headers"""
+        from starlette.requests import Request
+        from app.api.images import get_image
+        from app.models.image import Image
+        
+        path = tmp_path / "photo.jpg"
+        path.write_bytes(b"jpeg")
+        image = Image(
+            original_filename="photo.jpg",
+            stored_filename="photo.jpg",
+            file_path=str(path),
+            mime_type="image/jpeg",
+            file_size=4,
+        )
+        db_session.add(image)
+        await db_session.commit()
+        
+        def request(headers):
+            return Request({"type": "http", "method": "GET", "headers": headers})
+        
+        response = await get_image(image.id, request([]), db=db_session, current_user=None)
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        assert etag == f'W/"{image.id}-4"'
+        
+        response = await get_image(
+            image.id, request([(b"if-none-match", etag.encode())]), db=db_session, current_user=None
+        )
+        assert response.status_code == 304
+        assert response.body == b""
+        assert response.headers["etag"] == etag
+        assert "immutable" in response.headers["cache-control"]
+
+
+
+class TestSettingsApi:
+    """Tests for the user settings endpoints"""
+    
+    def test_defaults_follow_app_settings(self):
+        """Defaults and require_login come from the injected Settings"""
+        from fastapi.testclient import TestClient
+        from app.core.config import get_settings
+        from app.core.security import get_current_user_optional
+        from app.main import app
+        
+        config = get_settings().model_copy(update={"require_login": True, "default_quality": 42})
+        app.dependency_overrides[get_settings] = lambda: config
+        app.dependency_overrides[get_current_user_optional] = lambda: None
+        try:
+            response = TestClient(app).get("/api/settings/")
+        finally:
+            app.dependency_overrides.clear()
+        
+        assert response.status_code == 200
+        assert response.json()["require_login"] is True
+        assert response.json()["default_quality"] == 42
+
+
+
+class TestQueue:
+    """Tests for job queue endpoints"""
+    
+    @pytest.mark.asyncio
+    async def test_cancel_job_missing_vs_finished(self, db_session):
+        """Unknown jobs are 404, jobs that already finished are 400"""
+        from fastapi import HTTPException
+        from app.api.queue import cancel_job
+        from app.models.job import Job, JobStatus
+        
+        db_session.add(Job(job_id="done-job", operation="resize", status=JobStatus.COMPLETED))
+        await db_session.commit()
+        
+        with pytest.raises(HTTPException) as exc_info:
+            await cancel_job("no-such-job", db=db_session, current_user=None)
+        assert exc_info.value.status_code == 404
+        
+        with pytest.raises(HTTPException) as exc_info:
+            await cancel_job("done-job", db=db_session, current_user=None)
+        assert exc_info.value.status_code == 400
+
 
 # Run tests
 if __name__ == "__main__":
@@ -16,7 +16,15 @@ echo "🚀 Starting ImageMagick WebGUI..."
 echo "📦 Starting RQ worker..."
 cd /app/backend
 python -m app.workers.worker &
-WORKER_PID=$!
+WORKER_PIDS="$!"
+
+# Editor requests wait on their result, so they get workers of their own
+# that keep loaded models between jobs
+echo "🖌️ Starting ${INTERACTIVE_WORKERS:-2} interactive worker(s)..."
+for _ in $(seq 1 "${INTERACTIVE_WORKERS:-2}"); do
+  python -m app.workers.worker --interactive &
+  WORKER_PIDS="$WORKER_PIDS $!"
+done
 
 # Wait for database to be ready and initialize tables
 echo "🔧 Initializing database..."
@@ -45,7 +53,7 @@ echo "   - Backend API: http://localhost:8000"
 echo "   - API Docs: http://localhost:8000/docs"
 
 # Handle shutdown
-trap "kill $WORKER_PID $BACKEND_PID $FRONTEND_PID 2>/dev/null; exit 0" SIGTERM SIGINT
+trap "kill $WORKER_PIDS $BACKEND_PID $FRONTEND_PID 2>/dev/null; exit 0" SIGTERM SIGINT
 
 # Wait for any process to exit
 wait -n